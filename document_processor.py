@@ -4,15 +4,61 @@ Handles PDF, Excel, TXT, and DOCX policy documents
 """
 
 import io
+import os
 import re
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
-import PyPDF2
-import openpyxl
-from openpyxl import load_workbook
+import sys
+import threading
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, Any, Iterable, Iterator, Optional, Tuple, Union
+from dataclasses import dataclass, field
 
+# PyPDF2 and openpyxl are imported inside the processors that use them, so
+# text-only callers do not pay their import cost
 
-@dataclass
+
+# Drop the per-instance __dict__ where dataclasses support it (Python 3.10+)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Section header patterns, compiled once at import time. The header
+# alternatives share one pattern (anchored by .match) so each line is
+# scanned once; all-caps headers are checked by _is_all_caps_header.
+_SECTION_HDR_RE = re.compile(
+    r'\d+\.?\s+[A-Z]'                       # "1. SECTION" or "1 SECTION"
+    r'|[A-Z][a-z]+(?:\s+[A-Z][a-z]+){2,}'   # Title Case (3+ words)
+)
+_LEVEL_RE = re.compile(r'^([\d\.]+)')
+_PDF_SECTION_RE = re.compile(r'^(\d+\.?\d*\.?)\s+([A-Z][A-Z\s]{3,})')
+
+# Processors read either a filesystem path or an open binary file object
+Source = Union[str, BinaryIO]
+
+
+def _open_binary(source: Source):
+    """Open a path for binary reading, or rewind a file object without taking ownership"""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb')
+    source.seek(0)
+    return nullcontext(source)
+
+
+def _is_all_caps_header(line: str) -> bool:
+    """Match stripped lines of ^[A-Z\\s]{10,}$ using str methods only"""
+    
+    # isupper() cheaply rejects the common case of lines with lowercase text
+    if len(line) < 10 or not line.isupper():
+        return False
+    
+    letters = "".join(line.split())
+    return letters.isascii() and letters.isalpha()
+
+
+def _join_content(lines: List[str]) -> str:
+    """Join accumulated section lines, one newline-terminated line each"""
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class DocumentSection:
     """Represents a section of a document"""
     section_id: str
@@ -20,25 +66,51 @@ class DocumentSection:
     content: str
     level: int
     page_number: Optional[int] = None
-    subsections: List['DocumentSection'] = None
+    subsections: List['DocumentSection'] = field(default_factory=list)
     
     def __post_init__(self):
+        # Callers may still pass subsections=None explicitly
         if self.subsections is None:
             self.subsections = []
 
 
-class PDFPolicyProcessor:
-    """Process PDF policy documents"""
+class _ThreadLocalMetadata:
+    """Keeps metadata of the last processed file per thread, so one processor
+    instance can be shared by the factory"""
     
     def __init__(self):
-        self.metadata: Dict[str, Any] = {}
+        self._local = threading.local()
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return getattr(self._local, 'metadata', {})
     
-    def extract_text(self, file_path: str) -> str:
+    @metadata.setter
+    def metadata(self, value: Dict[str, Any]):
+        self._local.metadata = value
+
+
+class PDFPolicyProcessor(_ThreadLocalMetadata):
+    """Process PDF policy documents"""
+    
+    def extract_text(self, file_path: Source) -> str:
         """Extract text from PDF file"""
-        text_content = []
+        return "\n".join(
+            f"[Page {page_num}]\n{text}\n"
+            for page_num, text in self._iter_pages(file_path)
+        )
+    
+    def extract_structured_content(self, file_path: Source) -> List[DocumentSection]:
+        """Extract structured sections from PDF"""
+        return self._parse_sections(self._iter_lines(file_path))
+    
+    def _iter_pages(self, file_path: Source) -> Iterator[Tuple[int, str]]:
+        """Open the PDF once and yield (page_number, text) for each page"""
+        
+        import PyPDF2
         
         try:
-            with open(file_path, 'rb') as file:
+            with _open_binary(file_path) as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 
                 # Extract metadata
@@ -49,27 +121,24 @@ class PDFPolicyProcessor:
                 
                 # Extract text from each page
                 for page_num, page in enumerate(pdf_reader.pages, 1):
-                    text = page.extract_text()
-                    text_content.append(f"[Page {page_num}]\n{text}\n")
+                    yield page_num, page.extract_text()
         
         except Exception as e:
             raise Exception(f"Error processing PDF: {str(e)}")
-        
-        return "\n".join(text_content)
     
-    def extract_structured_content(self, file_path: str) -> List[DocumentSection]:
-        """Extract structured sections from PDF"""
-        text = self.extract_text(file_path)
-        return self._parse_sections(text)
+    def _iter_lines(self, file_path: Source) -> Iterator[str]:
+        """Yield text lines page by page, each page preceded by a [Page N] marker"""
+        for page_num, text in self._iter_pages(file_path):
+            yield f"[Page {page_num}]"
+            yield from text.split('\n')
     
-    def _parse_sections(self, text: str) -> List[DocumentSection]:
-        """Parse text into structured sections"""
+    def _parse_sections(self, lines: Iterable[str]) -> List[DocumentSection]:
+        """Parse lines of text into structured sections"""
         sections = []
         current_section = None
+        content_lines: List[str] = []
         section_counter = 0
         
-        lines = text.split('\n')
-        
         for line in lines:
             line = line.strip()
             if not line:
@@ -77,10 +146,11 @@ class PDFPolicyProcessor:
             
             # Detect section headers (various formats)
             # Format: "1. SECTION TITLE" or "SECTION TITLE" (all caps)
-            section_match = re.match(r'^(\d+\.?\d*\.?)\s+([A-Z][A-Z\s]{3,})', line)
-            if section_match or re.match(r'^[A-Z\s]{10,}$', line):
+            if _is_all_caps_header(line) or _PDF_SECTION_RE.match(line):
                 if current_section:
+                    current_section.content = _join_content(content_lines)
                     sections.append(current_section)
+                    content_lines = []
                 
                 section_counter += 1
                 current_section = DocumentSection(
@@ -90,29 +160,36 @@ class PDFPolicyProcessor:
                     level=1
                 )
             elif current_section:
-                current_section.content += line + "\n"
+                content_lines.append(line)
         
         if current_section:
+            current_section.content = _join_content(content_lines)
             sections.append(current_section)
         
         return sections
 
 
-class ExcelPolicyProcessor:
+class ExcelPolicyProcessor(_ThreadLocalMetadata):
     """Process Excel policy documents"""
     
-    def __init__(self):
-        self.metadata: Dict[str, Any] = {}
-    
-    def extract_policies(self, file_path: str) -> Dict[str, Any]:
-        """Extract policy data from Excel file"""
+    def extract_policies(self, file_path: Source, keep_rows: bool = True) -> Dict[str, Any]:
+        """Extract policy data from Excel file
+        
+        With keep_rows=False, raw rows are only retained for sheets that
+        yield no policy rules.
+        """
+        
+        from openpyxl import load_workbook
         
         try:
+            if not isinstance(file_path, (str, os.PathLike)):
+                file_path.seek(0)
             workbook = load_workbook(file_path, read_only=True)
+            sheet_names = workbook.sheetnames
             
             self.metadata = {
-                "sheets": workbook.sheetnames,
-                "total_sheets": len(workbook.sheetnames)
+                "sheets": sheet_names,
+                "total_sheets": len(sheet_names)
             }
             
             policies = {
@@ -120,17 +197,19 @@ class ExcelPolicyProcessor:
                 "sheets": {}
             }
             
-            for sheet_name in workbook.sheetnames:
+            # Sheets are read in one pass over the loaded workbook; openpyxl
+            # parsing holds the GIL, so reloading it per sheet in threads was slower
+            for sheet_name in sheet_names:
                 sheet = workbook[sheet_name]
-                policies["sheets"][sheet_name] = self._process_sheet(sheet)
-            
+                policies["sheets"][sheet_name] = self._process_sheet(sheet, keep_rows)
             workbook.close()
+            
             return policies
         
         except Exception as e:
             raise Exception(f"Error processing Excel file: {str(e)}")
     
-    def _process_sheet(self, sheet) -> Dict[str, Any]:
+    def _process_sheet(self, sheet, keep_rows: bool = True) -> Dict[str, Any]:
         """Process a single worksheet"""
         
         data = {
@@ -146,21 +225,56 @@ class ExcelPolicyProcessor:
         if headers:
             data["headers"] = [h if h else f"Column_{i}" for i, h in enumerate(headers)]
         
+        # Resolve each column's policy field once per sheet; sheets without
+        # policy columns skip rule extraction entirely
+        has_policy = self._has_policy_columns(data["headers"])
+        column_roles = self._get_column_roles(data["headers"]) if has_policy else []
+        collect_rows = keep_rows or not has_policy
+        
         # Process data rows
         for row in rows_iter:
-            if any(cell for cell in row):  # Skip empty rows
-                row_data = dict(zip(data["headers"], row))
-                data["rows"].append(row_data)
+            if any(row):  # Skip empty rows
+                if collect_rows:
+                    row_data = dict(zip(data["headers"], row))
+                    data["rows"].append(row_data)
                 
                 # Try to extract policy rules
-                policy_rule = self._extract_policy_from_row(row_data, data["headers"])
-                if policy_rule:
-                    data["policy_rules"].append(policy_rule)
+                if has_policy:
+                    policy_rule = self._extract_policy_from_row(row, column_roles)
+                    if policy_rule:
+                        data["policy_rules"].append(policy_rule)
+                        
+                        # Rows are only a fallback once rules are found
+                        if not keep_rows and collect_rows:
+                            data["rows"] = []
+                            collect_rows = False
         
         return data
     
-    def _extract_policy_from_row(self, row_data: Dict[str, Any], headers: List[str]) -> Optional[Dict[str, Any]]:
-        """Extract policy rule from Excel row"""
+    def _get_column_roles(self, headers: List[str]) -> List[Tuple[int, str]]:
+        """Map column indexes to the policy field they populate"""
+        
+        roles = []
+        
+        # Duplicate headers resolve to their last column, as dict(zip(...)) does
+        for header, index in {header: i for i, header in enumerate(headers)}.items():
+            header_lower = str(header).lower()
+            
+            if 'policy' in header_lower or 'rule' in header_lower:
+                roles.append((index, 'rule_name'))
+            elif 'description' in header_lower:
+                roles.append((index, 'description'))
+            elif 'requirement' in header_lower:
+                roles.append((index, 'requirement'))
+            elif 'category' in header_lower or 'type' in header_lower:
+                roles.append((index, 'category'))
+            elif 'level' in header_lower or 'priority' in header_lower:
+                roles.append((index, 'compliance_level'))
+        
+        return roles
+    
+    def _has_policy_columns(self, headers: List[str]) -> bool:
+        """Check if the sheet headers contain policy information"""
         
         # Common Excel policy formats:
         # - Policy ID | Policy Name | Description | Requirement | Category
@@ -168,38 +282,31 @@ class ExcelPolicyProcessor:
         
         policy_columns = ['policy', 'rule', 'requirement', 'description']
         
-        # Check if row contains policy information
-        has_policy = any(
+        return any(
             any(col_keyword in str(header).lower() for col_keyword in policy_columns)
             for header in headers
         )
-        
-        if not has_policy:
-            return None
+    
+    def _extract_policy_from_row(
+        self,
+        row: Tuple[Any, ...],
+        column_roles: List[Tuple[int, str]]
+    ) -> Optional[Dict[str, Any]]:
+        """Extract policy rule from Excel row"""
         
         policy_rule = {}
         
-        for header, value in row_data.items():
+        for index, role in column_roles:
+            value = row[index] if index < len(row) else None
             if value:
-                header_lower = str(header).lower()
-                
-                if 'policy' in header_lower or 'rule' in header_lower:
-                    policy_rule['rule_name'] = str(value)
-                elif 'description' in header_lower:
-                    policy_rule['description'] = str(value)
-                elif 'requirement' in header_lower:
-                    policy_rule['requirement'] = str(value)
-                elif 'category' in header_lower or 'type' in header_lower:
-                    policy_rule['category'] = str(value)
-                elif 'level' in header_lower or 'priority' in header_lower:
-                    policy_rule['compliance_level'] = str(value)
+                policy_rule[role] = str(value)
         
         return policy_rule if policy_rule else None
     
-    def convert_to_text(self, file_path: str) -> str:
+    def convert_to_text(self, file_path: Source) -> str:
         """Convert Excel content to text format"""
         
-        policies = self.extract_policies(file_path)
+        policies = self.extract_policies(file_path, keep_rows=False)
         text_parts = []
         
         for sheet_name, sheet_data in policies["sheets"].items():
@@ -223,13 +330,20 @@ class ExcelPolicyProcessor:
 class TextPolicyProcessor:
     """Process plain text policy documents"""
     
-    def extract_text(self, file_path: str) -> str:
+    def extract_text(self, file_path: Source) -> str:
         """Extract text from file"""
         
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            return file.read()
+        # Read raw bytes and decode once, bypassing the incremental text layer
+        with _open_binary(file_path) as file:
+            text = file.read().decode('utf-8', errors='ignore')
+        
+        # Keep text-mode universal newline handling
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        
+        return text
     
-    def extract_structured_content(self, file_path: str) -> List[DocumentSection]:
+    def extract_structured_content(self, file_path: Source) -> List[DocumentSection]:
         """Extract structured sections"""
         text = self.extract_text(file_path)
         return self._parse_sections(text)
@@ -238,6 +352,7 @@ class TextPolicyProcessor:
         """Parse text into sections"""
         sections = []
         current_section = None
+        content_lines: List[str] = []
         section_counter = 0
         
         lines = text.split('\n')
@@ -250,7 +365,9 @@ class TextPolicyProcessor:
             # Detect section headers
             if self._is_section_header(line):
                 if current_section:
+                    current_section.content = _join_content(content_lines)
                     sections.append(current_section)
+                    content_lines = []
                 
                 section_counter += 1
                 current_section = DocumentSection(
@@ -260,56 +377,53 @@ class TextPolicyProcessor:
                     level=self._get_section_level(line)
                 )
             elif current_section:
-                current_section.content += line + "\n"
+                content_lines.append(line)
         
         if current_section:
+            current_section.content = _join_content(content_lines)
             sections.append(current_section)
         
         return sections
     
     def _is_section_header(self, line: str) -> bool:
         """Check if line is a section header"""
-        
-        # Various header patterns
-        patterns = [
-            r'^\d+\.?\s+[A-Z]',  # "1. SECTION" or "1 SECTION"
-            r'^[A-Z\s]{10,}$',    # All caps, 10+ chars
-            r'^[A-Z][a-z]+(\s+[A-Z][a-z]+){2,}',  # Title Case (3+ words)
-        ]
-        
-        return any(re.match(pattern, line) for pattern in patterns)
+        return _is_all_caps_header(line) or _SECTION_HDR_RE.match(line) is not None
     
     def _get_section_level(self, line: str) -> int:
         """Determine section nesting level"""
         
         # Count leading numbering depth (1.2.3 -> level 3)
-        number_match = re.match(r'^([\d\.]+)', line)
+        number_match = _LEVEL_RE.match(line)
         if number_match:
             return number_match.group(1).count('.')
         
         return 1
 
 
+@lru_cache(maxsize=8)
+def _get_shared_processor(file_type: str):
+    """Create the processor for a normalized file type once and reuse it"""
+    
+    if file_type in ['pdf']:
+        return PDFPolicyProcessor()
+    elif file_type in ['xlsx', 'xls', 'excel']:
+        return ExcelPolicyProcessor()
+    elif file_type in ['txt', 'text']:
+        return TextPolicyProcessor()
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+
 class DocumentProcessorFactory:
     """Factory for creating document processors"""
     
     @staticmethod
     def get_processor(file_type: str):
-        """Get appropriate processor for file type"""
-        
-        file_type = file_type.lower()
-        
-        if file_type in ['pdf']:
-            return PDFPolicyProcessor()
-        elif file_type in ['xlsx', 'xls', 'excel']:
-            return ExcelPolicyProcessor()
-        elif file_type in ['txt', 'text']:
-            return TextPolicyProcessor()
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
+        """Get appropriate processor for file type (shared per type)"""
+        return _get_shared_processor(file_type.lower())
     
     @staticmethod
-    def process_file(file_path: str, file_type: str) -> str:
+    def process_file(file_path: Source, file_type: str) -> str:
         """Process file and return text content"""
         
         processor = DocumentProcessorFactory.get_processor(file_type)
@@ -322,6 +436,11 @@ class DocumentProcessorFactory:
             return processor.extract_text(file_path)
         else:
             raise ValueError(f"Unknown processor type")
+    
+    @staticmethod
+    def process_stream(fileobj: BinaryIO, file_type: str) -> str:
+        """Process an open binary file object (e.g. BytesIO) without a temp file"""
+        return DocumentProcessorFactory.process_file(fileobj, file_type)
 
 
 # Testing utilities
@@ -5,12 +5,30 @@ Deterministic governance layer over probabilistic AI agents for regulated indust
 
 import json
 import asyncio
-from typing import Dict, List, Any, Optional, Callable
+from collections import Counter, deque
+from typing import Deque, Dict, Iterable, Iterator, List, Any, NamedTuple, Optional, Callable, Tuple
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import Enum, IntFlag
 import re
 from datetime import datetime
 import hashlib
+import os
+import sys
+import threading
+from secrets import token_hex
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib json module
+    orjson = None
+
+# Drop the per-instance __dict__ where dataclasses support it (Python 3.10+)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 
 class ComplianceLevel(Enum):
@@ -31,7 +49,27 @@ class AgentRole(Enum):
     EXECUTOR = "executor"
 
 
-@dataclass
+class ConstraintFlag(IntFlag):
+    """Constraint types a rule carries, as bits precomputed per rule"""
+    DATA_RETENTION = 1
+    ENCRYPTION_REQUIRED = 2
+    PII_HANDLING = 4
+
+
+_CONSTRAINT_FLAGS = {
+    "data_retention": ConstraintFlag.DATA_RETENTION,
+    "encryption_required": ConstraintFlag.ENCRYPTION_REQUIRED,
+    "pii_handling": ConstraintFlag.PII_HANDLING,
+}
+
+# Risk added per violated rule; other levels add nothing
+_RISK_WEIGHTS = {
+    ComplianceLevel.MANDATORY: 10.0,
+    ComplianceLevel.REQUIRED: 5.0,
+}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class PolicyRule:
     """Structured policy rule extracted from documents"""
     rule_id: str
@@ -44,6 +82,17 @@ class PolicyRule:
     validation_logic: Optional[str] = None
     source_document: str = ""
     section_reference: str = ""
+    # Bitwise OR of ConstraintFlag values for the constraint types above
+    constraint_mask: int = field(default=0, init=False, compare=False)
+    # Risk score a violation of this rule adds, fixed by its compliance level
+    risk_weight: float = field(default=0.0, init=False, compare=False)
+    
+    def __post_init__(self):
+        mask = 0
+        for constraint in self.constraints:
+            mask |= _CONSTRAINT_FLAGS.get(constraint.get('type'), 0)
+        self.constraint_mask = int(mask)
+        self.risk_weight = _RISK_WEIGHTS.get(self.compliance_level, 0.0)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -60,7 +109,19 @@ class PolicyRule:
         }
 
 
-@dataclass
+class AuditEntry(NamedTuple):
+    """Immutable record of a single governance decision"""
+    timestamp: str
+    request_id: str
+    action: str
+    user_id: str
+    approved: bool
+    risk_score: float
+    violations: Tuple[str, ...]
+    rules_evaluated: int
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class ExecutionContext:
     """Context for agent execution with governance controls"""
     request_id: str
@@ -72,7 +133,107 @@ class ExecutionContext:
     compliance_checks: Dict[str, bool] = field(default_factory=dict)
     risk_score: float = 0.0
     approved: bool = False
-    audit_trail: List[Dict[str, Any]] = field(default_factory=list)
+    audit_trail: List[AuditEntry] = field(default_factory=list)
+
+
+# Common patterns in regulatory documents, compiled once at import time.
+# Order matters: the first matching pattern names the rule's subcategory.
+# These stay on the stdlib re engine: the regex module and google-re2 were
+# both slower on short policy lines.
+_RULE_PATTERNS = {
+    'mandatory': re.compile(r'(must|shall|required to|mandatory)', re.IGNORECASE),
+    'prohibited': re.compile(r'(must not|shall not|prohibited|forbidden)', re.IGNORECASE),
+    'recommended': re.compile(r'(should|recommended|advised to)', re.IGNORECASE),
+    'data_retention': re.compile(r'(retain|retention period|keep.*for|maintain.*(?:for|during))\s+(\d+)\s+(days?|months?|years?)', re.IGNORECASE),
+    'approval_required': re.compile(r'(approval required|must be approved|requires authorization)', re.IGNORECASE),
+    'encryption': re.compile(r'(encrypt|encryption|encrypted)', re.IGNORECASE),
+    'pii_handling': re.compile(r'(personally identifiable|PII|personal data|customer information)', re.IGNORECASE),
+}
+
+
+def _build_rule_prefilter():
+    """Compile the rule patterns into one Hyperscan database, if available"""
+    if hyperscan is None:
+        return None
+    
+    # Keep matches inside a single line: Python's ASCII \s minus the newline
+    expressions = [
+        pattern.pattern.replace(r'\s', r'[\t\x0b\x0c\r \x1c-\x1f]').encode()
+        for pattern in _RULE_PATTERNS.values()
+    ]
+    database = hyperscan.Database()
+    database.compile(
+        expressions=expressions,
+        ids=list(range(len(expressions))),
+        flags=[hyperscan.HS_FLAG_CASELESS] * len(expressions)
+    )
+    return database
+
+
+_RULE_PREFILTER = _build_rule_prefilter()
+# A scratch space serves one scan at a time, and parses run concurrently in
+# executor threads and on the app's shared loop, so each thread gets its own
+_RULE_SCRATCH = threading.local()
+
+
+def _rule_prefilter_scratch():
+    """Return this thread's Hyperscan scratch space for _RULE_PREFILTER"""
+    scratch = getattr(_RULE_SCRATCH, 'scratch', None)
+    if scratch is None:
+        scratch = _RULE_SCRATCH.scratch = hyperscan.Scratch(_RULE_PREFILTER)
+    return scratch
+
+
+def _rule_candidate_lines(content: str) -> Optional[set]:
+    """Return indexes of lines that may hold a rule, or None to check every line"""
+    # Byte offsets equal str offsets only for ASCII, which also keeps
+    # Hyperscan's case folding identical to re.IGNORECASE
+    if _RULE_PREFILTER is None or not content.isascii():
+        return None
+    
+    match_ends = []
+    
+    def on_match(pattern_id, start, end, flags, context):
+        match_ends.append(end)
+    
+    _RULE_PREFILTER.scan(
+        content.encode(), match_event_handler=on_match, scratch=_rule_prefilter_scratch()
+    )
+    
+    # Hits arrive in offset order, so count newlines between consecutive hits
+    candidates = set()
+    line_no = 0
+    position = 0
+    for end in match_ends:
+        line_no += content.count('\n', position, end - 1)
+        position = end - 1
+        candidates.add(line_no)
+    return candidates
+
+
+# The level patterns lead _RULE_PATTERNS, so the first pattern that
+# matches a line already decides its compliance level
+_LEVEL_BY_PATTERN = {
+    name: {
+        'mandatory': ComplianceLevel.MANDATORY,
+        'prohibited': ComplianceLevel.MANDATORY,
+        'recommended': ComplianceLevel.RECOMMENDED,
+    }.get(name, ComplianceLevel.REQUIRED)
+    for name in _RULE_PATTERNS
+}
+
+# Pattern names that can still match a line, given the first one that did
+_PATTERNS_FROM = {
+    name: frozenset(list(_RULE_PATTERNS)[i:])
+    for i, name in enumerate(_RULE_PATTERNS)
+}
+
+_SECTION_CAPS_RE = re.compile(r'^[A-Z\s]{5,}$')
+_SECTION_NUMBER_RE = re.compile(r'^\d+\.')
+
+# Category keywords, checked in priority order (Governance before Risk)
+_GOVERNANCE_KEYWORDS = ('approval', 'authorization', 'oversight', 'board', 'committee')
+_RISK_KEYWORDS = ('risk', 'threat', 'vulnerability', 'security', 'breach')
 
 
 class PolicyParser:
@@ -83,118 +244,151 @@ class PolicyParser:
         
     async def parse_text(self, content: str, source: str) -> List[PolicyRule]:
         """Parse text content into policy rules"""
+        rules, _ = self._parse_lines(content, source, 0, "General")
+        return rules
+    
+    def parse_pages(self, pages: Iterable[str], source: str) -> List[PolicyRule]:
+        """Parse page texts one at a time, numbering lines as if they were joined by newlines"""
+        rules = []
+        first_line = 0
+        current_section = "General"
+        for page in pages:
+            page_rules, current_section = self._parse_lines(page, source, first_line, current_section)
+            rules.extend(page_rules)
+            first_line += page.count('\n') + 1
+        return rules
+    
+    def _parse_lines(
+        self,
+        content: str,
+        source: str,
+        first_line: int,
+        current_section: Optional[str]
+    ) -> Tuple[List[PolicyRule], Optional[str]]:
+        """Parse lines into rules, returning them with the last section seen"""
         rules = []
         
         # Enhanced parsing logic for GRC documents
-        # Looking for common patterns in regulatory documents
-        
-        patterns = {
-            'mandatory': r'(?i)(must|shall|required to|mandatory)',
-            'prohibited': r'(?i)(must not|shall not|prohibited|forbidden)',
-            'recommended': r'(?i)(should|recommended|advised to)',
-            'data_retention': r'(?i)(retain|retention period|keep.*for|maintain.*(?:for|during))\s+(\d+)\s+(days?|months?|years?)',
-            'approval_required': r'(?i)(approval required|must be approved|requires authorization)',
-            'encryption': r'(?i)(encrypt|encryption|encrypted)',
-            'pii_handling': r'(?i)(personally identifiable|PII|personal data|customer information)',
-        }
+        patterns = _RULE_PATTERNS
         
         lines = content.split('\n')
-        current_section = "General"
+        id_prefix = f"{source}:".encode()
+        # One Hyperscan pass over the whole document, when installed
+        candidate_lines = _rule_candidate_lines(content)
         
-        for i, line in enumerate(lines):
+        for i, line in enumerate(lines, first_line):
             line = line.strip()
             if not line:
                 continue
                 
             # Detect section headers
-            if re.match(r'^[A-Z\s]{5,}$', line) or re.match(r'^\d+\.', line):
+            if _SECTION_CAPS_RE.match(line) or _SECTION_NUMBER_RE.match(line):
                 current_section = line
                 continue
             
-            # Extract rules based on patterns
-            for pattern_name, pattern in patterns.items():
-                if re.search(pattern, line):
-                    rule_id = hashlib.md5(f"{source}:{i}:{line}".encode()).hexdigest()[:12]
-                    
-                    # Determine compliance level
-                    if re.search(patterns['mandatory'], line):
-                        level = ComplianceLevel.MANDATORY
-                    elif re.search(patterns['prohibited'], line):
-                        level = ComplianceLevel.MANDATORY
-                    elif re.search(patterns['recommended'], line):
-                        level = ComplianceLevel.RECOMMENDED
-                    else:
-                        level = ComplianceLevel.REQUIRED
-                    
-                    # Extract constraints
-                    constraints = []
-                    
-                    # Data retention constraint
-                    retention_match = re.search(patterns['data_retention'], line)
-                    if retention_match:
-                        constraints.append({
-                            "type": "data_retention",
-                            "duration": f"{retention_match.group(2)} {retention_match.group(3)}"
-                        })
-                    
-                    # Encryption constraint
-                    if re.search(patterns['encryption'], line):
-                        constraints.append({
-                            "type": "encryption_required",
-                            "algorithm": "AES-256"  # Default
-                        })
-                    
-                    # PII handling
-                    if re.search(patterns['pii_handling'], line):
-                        constraints.append({
-                            "type": "pii_handling",
-                            "requires_consent": True,
-                            "requires_encryption": True
-                        })
-                    
-                    rule = PolicyRule(
-                        rule_id=rule_id,
-                        category=self._categorize_rule(line),
-                        subcategory=pattern_name,
-                        description=line,
-                        requirement=line,
-                        compliance_level=level,
-                        constraints=constraints,
-                        source_document=source,
-                        section_reference=current_section
-                    )
-                    rules.append(rule)
-                    break  # Only match first pattern per line
+            if candidate_lines is not None and i - first_line not in candidate_lines:
+                continue
+            
+            # Extract rules based on patterns (only the first match per line)
+            pattern_name = None
+            for name, pattern in patterns.items():
+                if pattern.search(line):
+                    pattern_name = name
+                    break
+            if pattern_name is None:
+                continue
+            
+            # Short non-cryptographic id; blake2b is the fastest stdlib digest here
+            rule_id = hashlib.blake2b(
+                id_prefix + f"{i}:{line}".encode(), digest_size=6
+            ).hexdigest()
+            
+            # Determine compliance level
+            level = _LEVEL_BY_PATTERN[pattern_name]
+            
+            # Extract constraints; patterns ordered before the first match cannot match
+            constraints = []
+            plausible = _PATTERNS_FROM[pattern_name]
+            
+            # Data retention constraint
+            retention_match = 'data_retention' in plausible and patterns['data_retention'].search(line)
+            if retention_match:
+                constraints.append({
+                    "type": "data_retention",
+                    "duration": f"{retention_match.group(2)} {retention_match.group(3)}"
+                })
+            
+            # Encryption constraint
+            if 'encryption' in plausible and patterns['encryption'].search(line):
+                constraints.append({
+                    "type": "encryption_required",
+                    "algorithm": "AES-256"  # Default
+                })
+            
+            # PII handling
+            if patterns['pii_handling'].search(line):
+                constraints.append({
+                    "type": "pii_handling",
+                    "requires_consent": True,
+                    "requires_encryption": True
+                })
+            
+            rule = PolicyRule(
+                rule_id=rule_id,
+                category=self._categorize_rule(line),
+                subcategory=pattern_name,
+                description=line,
+                requirement=line,
+                compliance_level=level,
+                constraints=constraints,
+                source_document=source,
+                section_reference=current_section
+            )
+            rules.append(rule)
         
-        return rules
+        return rules, current_section
     
     def _categorize_rule(self, text: str) -> str:
         """Categorize rule into Governance, Risk, or Compliance"""
-        governance_keywords = ['approval', 'authorization', 'oversight', 'board', 'committee']
-        risk_keywords = ['risk', 'threat', 'vulnerability', 'security', 'breach']
-        
         text_lower = text.lower()
         
-        if any(kw in text_lower for kw in governance_keywords):
+        if any(kw in text_lower for kw in _GOVERNANCE_KEYWORDS):
             return "Governance"
-        elif any(kw in text_lower for kw in risk_keywords):
+        elif any(kw in text_lower for kw in _RISK_KEYWORDS):
             return "Risk"
         else:
             return "Compliance"
 
 
+# Bound on generated rule functions memoized per generator before the cache is reset
+_RULE_CODE_CACHE_MAX = 4096
+
+
 class RuleGenerator:
     """Agent that generates executable Python code from policy rules"""
     
     def __init__(self):
         self.role = AgentRole.RULE_GENERATOR
+        # Rule ids hash the source and line text every other field derives from
+        self._code_cache: Dict[str, str] = {}
     
     def generate_rule_code(self, rule: PolicyRule) -> str:
-        """Generate Python validation function for a rule"""
+        """Generate Python validation function for a rule (cached per rule id)"""
+        code = self._code_cache.get(rule.rule_id)
+        if code is None:
+            # Every new or edited document brings new ids, so the cache is reset when full
+            if len(self._code_cache) >= _RULE_CODE_CACHE_MAX:
+                self._code_cache.clear()
+            code = "".join(self._rule_code_parts(rule))
+            self._code_cache[rule.rule_id] = code
+        return code
+    
+    def _rule_code_parts(self, rule: PolicyRule) -> List[str]:
+        """Generate the validation function for a rule as code fragments"""
         
         function_name = f"validate_{rule.rule_id}"
         
-        code_template = f'''
+        parts = [f'''
 def {function_name}(context: Dict[str, Any]) -> Dict[str, Any]:
     """
     Rule: {rule.description}
@@ -209,20 +403,20 @@ def {function_name}(context: Dict[str, Any]) -> Dict[str, Any]:
         "warnings": []
     }}
     
-'''
+''']
         
         # Generate validation logic based on constraints
         for constraint in rule.constraints:
             if constraint['type'] == 'encryption_required':
-                code_template += '''
+                parts.append('''
     # Check encryption requirement
     if not context.get('encryption_enabled', False):
         result["passed"] = False
         result["violations"].append("Encryption is required but not enabled")
-'''
+''')
             
             elif constraint['type'] == 'pii_handling':
-                code_template += '''
+                parts.append('''
     # Check PII handling requirements
     if context.get('contains_pii', False):
         if not context.get('user_consent', False):
@@ -231,34 +425,34 @@ def {function_name}(context: Dict[str, Any]) -> Dict[str, Any]:
         if not context.get('encryption_enabled', False):
             result["passed"] = False
             result["violations"].append("PII must be encrypted")
-'''
+''')
             
             elif constraint['type'] == 'data_retention':
-                code_template += f'''
+                parts.append(f'''
     # Check data retention policy
     retention_days = context.get('retention_days', 0)
     max_retention = "{constraint['duration']}"
     # Additional retention validation logic here
-'''
+''')
         
         # Add compliance level check
         if rule.compliance_level == ComplianceLevel.MANDATORY:
-            code_template += '''
+            parts.append('''
     # Mandatory rule - must pass
     if not result["passed"]:
         result["severity"] = "CRITICAL"
-'''
+''')
         
-        code_template += '''
+        parts.append('''
     return result
-'''
+''')
         
-        return code_template
+        return parts
     
     def generate_rule_module(self, rules: List[PolicyRule]) -> str:
         """Generate complete Python module with all rules"""
         
-        module_code = '''"""
+        parts = ['''"""
 Auto-generated GRC Compliance Rules
 Generated from policy documents
 DO NOT EDIT MANUALLY
@@ -267,24 +461,24 @@ DO NOT EDIT MANUALLY
 from typing import Dict, Any, List
 from datetime import datetime
 
-'''
+''']
         
         # Generate all rule functions
         for rule in rules:
-            module_code += self.generate_rule_code(rule)
-            module_code += "\n"
+            parts.append(self.generate_rule_code(rule))
+            parts.append("\n")
         
         # Generate rule registry
-        module_code += '''
+        parts.append('''
 
 # Rule Registry
 COMPLIANCE_RULES = {
-'''
+''')
         
         for rule in rules:
-            module_code += f'    "{rule.rule_id}": validate_{rule.rule_id},\n'
+            parts.append(f'    "{rule.rule_id}": validate_{rule.rule_id},\n')
         
-        module_code += '''}
+        parts.append('''}
 
 def validate_all_rules(context: Dict[str, Any]) -> Dict[str, Any]:
     """Validate context against all compliance rules"""
@@ -308,9 +502,9 @@ def validate_all_rules(context: Dict[str, Any]) -> Dict[str, Any]:
         results["warnings"].extend(rule_result.get("warnings", []))
     
     return results
-'''
+''')
         
-        return module_code
+        return "".join(parts)
 
 
 class ComplianceValidator:
@@ -322,10 +516,14 @@ class ComplianceValidator:
     
     async def validate(self, context: ExecutionContext) -> Dict[str, Any]:
         """Validate execution context against all applicable rules"""
+        return self.validate_sync(context)
+    
+    def validate_sync(self, context: ExecutionContext) -> Dict[str, Any]:
+        """Validate without a coroutine round-trip; validation never awaits"""
         
         validation_result = {
             "context_id": context.request_id,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": context.timestamp.isoformat(),
             "passed": True,
             "violations": [],
             "warnings": [],
@@ -343,10 +541,7 @@ class ComplianceValidator:
                 validation_result["violations"].extend(rule_check.get("violations", []))
                 
                 # Increase risk score for violations
-                if rule.compliance_level == ComplianceLevel.MANDATORY:
-                    validation_result["risk_score"] += 10.0
-                elif rule.compliance_level == ComplianceLevel.REQUIRED:
-                    validation_result["risk_score"] += 5.0
+                validation_result["risk_score"] += rule.risk_weight
         
         return validation_result
     
@@ -361,29 +556,74 @@ class ComplianceValidator:
         }
         
         # Check constraints
-        for constraint in rule.constraints:
-            if constraint['type'] == 'encryption_required':
-                if not context.parameters.get('encryption_enabled', False):
-                    result["passed"] = False
-                    result["violations"].append(
-                        f"Violation: {rule.description} - Encryption not enabled"
-                    )
-            
-            # Add more constraint checks here
+        if rule.constraint_mask & ConstraintFlag.ENCRYPTION_REQUIRED:
+            if not context.parameters.get('encryption_enabled', False):
+                result["passed"] = False
+                result["violations"].append(
+                    f"Violation: {rule.description} - Encryption not enabled"
+                )
+        
+        # Add more constraint checks here
         
         return result
 
 
+# Bound on memoized action words per enforcer before the word index is reset
+_WORD_INDEX_MAX_WORDS = 4096
+# In-memory audit entries kept per enforcer; audit_log_path keeps the full history
+_AUDIT_LOG_MAXLEN = 100_000
+
+
+def _iter_pdf_pages(content: Any) -> Iterator[str]:
+    """Yield the text of each PDF page from bytes or a binary file object"""
+    import io
+    stream = io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+    
+    # Extract text using PyPDF2
+    import PyPDF2
+    pdf_reader = PyPDF2.PdfReader(stream)
+    for page in pdf_reader.pages:
+        yield page.extract_text()
+
+
+def _extract_excel_text(content: Any) -> str:
+    """Extract plain text from Excel content given as bytes or a binary file object"""
+    import io
+    stream = io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+    
+    # Extract text using openpyxl; read-only mode streams rows instead of loading every cell
+    import openpyxl
+    workbook = openpyxl.load_workbook(stream, read_only=True)
+    try:
+        text_content = []
+        for sheet in workbook.worksheets:
+            for row in sheet.iter_rows(values_only=True):
+                row_text = " ".join(str(cell) for cell in row if cell is not None)
+                if row_text.strip():
+                    text_content.append(row_text)
+        return "\n".join(text_content)
+    finally:
+        workbook.close()
+
+
 class GovernanceEnforcer:
     """Master agent that enforces governance policies over all other agents"""
     
-    def __init__(self):
+    def __init__(self, audit_log_path: Optional[str] = None):
         self.role = AgentRole.GOVERNANCE_ENFORCER
         self.policy_parser = PolicyParser()
         self.rule_generator = RuleGenerator()
         self.validator = ComplianceValidator()
-        self.audit_log: List[Dict[str, Any]] = []
+        self.audit_log: Deque[AuditEntry] = deque(maxlen=_AUDIT_LOG_MAXLEN)
+        # Optional append-only NDJSON copy of every audit entry
+        self._audit_fd: Optional[int] = None
+        if audit_log_path:
+            self._audit_fd = os.open(audit_log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
         self.active_rules: List[PolicyRule] = []
+        # Lowercased match text per rule, index-aligned with active_rules
+        self._rule_texts: List[str] = []
+        # Action word -> indexes of rules whose match text contains it
+        self._word_index: Dict[str, Tuple[int, ...]] = {}
     
     async def load_policies(self, content: str, source: str, file_type: str) -> Dict[str, Any]:
         """Load and parse policy documents"""
@@ -391,32 +631,22 @@ class GovernanceEnforcer:
         print(f"📋 Loading policy from: {source} (type: {file_type})")
 
         # Handle different file types
+        loop = asyncio.get_running_loop()
         if file_type == 'pdf':
-            # For PDF, content is bytes - extract text using PyPDF2
-            import PyPDF2
-            import io
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-            text_content = []
-            for page in pdf_reader.pages:
-                text_content.append(page.extract_text())
-            content = "\n".join(text_content)
-        elif file_type == 'excel':
-            # For Excel, content is bytes - extract text using openpyxl
-            import openpyxl
-            import io
-            workbook = openpyxl.load_workbook(io.BytesIO(content))
-            text_content = []
-            for sheet in workbook.worksheets:
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = " ".join(str(cell) for cell in row if cell is not None)
-                    if row_text.strip():
-                        text_content.append(row_text)
-            content = "\n".join(text_content)
-        # else: content is already a string for text files
-
-        # Parse policies
-        rules = await self.policy_parser.parse_text(content, source)
-        self.active_rules.extend(rules)
+            # Pages are extracted and parsed one at a time in a worker thread,
+            # so the whole document's text is never held at once
+            rules = await loop.run_in_executor(
+                None, self.policy_parser.parse_pages, _iter_pdf_pages(content), source
+            )
+        else:
+            if file_type == 'excel':
+                # Workbooks are extracted in a worker thread, keeping the event loop free
+                content = await loop.run_in_executor(None, _extract_excel_text, content)
+            # else: content is already a string for text files
+
+            # Parse policies
+            rules = await self.policy_parser.parse_text(content, source)
+        self.add_rules(rules)
 
         print(f"✅ Extracted {len(rules)} policy rules")
         
@@ -433,44 +663,72 @@ class GovernanceEnforcer:
             "rules": [rule.to_dict() for rule in rules]
         }
         
+        by_category, by_compliance_level = self._summarize_rules(rules)
+        
         return {
             "rules": rules,
             "rules_json": rules_json,
             "python_code": rule_code,
             "summary": {
                 "total_rules": len(rules),
-                "by_category": self._count_by_category(rules),
-                "by_compliance_level": self._count_by_compliance_level(rules)
+                "by_category": by_category,
+                "by_compliance_level": by_compliance_level
             }
         }
     
     async def enforce_governance(self, context: ExecutionContext) -> Dict[str, Any]:
         """Enforce governance rules on an execution context"""
+        return self._enforce(context, self._find_applicable_rules(context))
+    
+    async def enforce_governance_batch(
+        self,
+        contexts: List[ExecutionContext]
+    ) -> List[Dict[str, Any]]:
+        """Enforce governance on many contexts, resolving each distinct action once"""
+        rules_by_action: Dict[str, List[PolicyRule]] = {}
+        results = []
+        
+        for context in contexts:
+            applicable = rules_by_action.get(context.action)
+            if applicable is None:
+                applicable = self._find_applicable_rules(context)
+                rules_by_action[context.action] = applicable
+            # Each context gets its own list, as with enforce_governance
+            results.append(self._enforce(context, list(applicable)))
         
-        # Find applicable rules
-        context.applicable_rules = self._find_applicable_rules(context)
+        return results
+    
+    def _enforce(
+        self,
+        context: ExecutionContext,
+        applicable_rules: List[PolicyRule]
+    ) -> Dict[str, Any]:
+        """Validate a context against its applicable rules and audit the decision"""
+        context.applicable_rules = applicable_rules
         
         # Validate against rules
-        validation = await self.validator.validate(context)
+        validation = self.validator.validate_sync(context)
         
         # Make governance decision
         context.approved = validation["passed"]
         context.risk_score = validation["risk_score"]
         
         # Log to audit trail
-        audit_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "request_id": context.request_id,
-            "action": context.action,
-            "user_id": context.user_id,
-            "approved": context.approved,
-            "risk_score": context.risk_score,
-            "violations": validation["violations"],
-            "rules_evaluated": len(context.applicable_rules)
-        }
+        audit_entry = AuditEntry(
+            timestamp=validation["timestamp"],
+            request_id=context.request_id,
+            action=context.action,
+            user_id=context.user_id,
+            approved=context.approved,
+            risk_score=context.risk_score,
+            violations=tuple(validation["violations"]),
+            rules_evaluated=len(context.applicable_rules)
+        )
         
         self.audit_log.append(audit_entry)
         context.audit_trail.append(audit_entry)
+        if self._audit_fd is not None:
+            self._write_audit_entry(audit_entry)
         
         return {
             "approved": context.approved,
@@ -479,53 +737,99 @@ class GovernanceEnforcer:
             "audit_entry": audit_entry
         }
     
+    def _write_audit_entry(self, audit_entry: AuditEntry) -> None:
+        """Append one audit entry to the audit log file as a JSON line"""
+        if orjson is not None:
+            line = orjson.dumps(audit_entry._asdict()) + b"\n"
+        else:
+            line = json.dumps(audit_entry._asdict()).encode() + b"\n"
+        os.write(self._audit_fd, line)
+    
+    def close(self) -> None:
+        """Close the audit log file, if one was opened"""
+        if self._audit_fd is not None:
+            os.close(self._audit_fd)
+            self._audit_fd = None
+    
+    def add_rules(self, rules: List[PolicyRule]) -> None:
+        """Activate parsed rules and precompute the text they are matched on"""
+        rule_texts = self._get_rule_texts()
+        self.active_rules.extend(rules)
+        rule_texts.extend(
+            (rule.description + " " + rule.requirement).lower()
+            for rule in rules
+        )
+        self._word_index.clear()
+    
+    def _get_rule_texts(self) -> List[str]:
+        """Return match texts parallel to active_rules, rebuilding if they drifted"""
+        if len(self._rule_texts) != len(self.active_rules):
+            self._rule_texts = [
+                (rule.description + " " + rule.requirement).lower()
+                for rule in self.active_rules
+            ]
+            self._word_index.clear()
+        return self._rule_texts
+    
+    def _rules_containing(self, word: str) -> Tuple[int, ...]:
+        """Indexes of rules whose match text contains word, memoized per word"""
+        indexes = self._word_index.get(word)
+        if indexes is None:
+            if len(self._word_index) >= _WORD_INDEX_MAX_WORDS:
+                self._word_index.clear()
+            indexes = tuple(
+                idx for idx, rule_text in enumerate(self._rule_texts)
+                if word in rule_text
+            )
+            self._word_index[word] = indexes
+        return indexes
+    
     def _find_applicable_rules(self, context: ExecutionContext) -> List[PolicyRule]:
         """Find rules applicable to the execution context"""
-        applicable = []
+        # Basic matching - a rule applies when any action word occurs in its text
+        action_words = set(context.action.lower().split())
+        active_rules = self.active_rules
+        self._get_rule_texts()
         
-        for rule in self.active_rules:
-            # Match based on action type, category, etc.
-            if self._rule_applies(rule, context):
-                applicable.append(rule)
+        # Only rules sharing a word with the action are visited, in rule order
+        if len(action_words) == 1:
+            indexes = self._rules_containing(action_words.pop())
+        else:
+            indexes = sorted(set().union(
+                *(self._rules_containing(word) for word in action_words)
+            ))
         
-        return applicable
+        return [active_rules[idx] for idx in indexes]
     
-    def _rule_applies(self, rule: PolicyRule, context: ExecutionContext) -> bool:
-        """Check if a rule applies to the given context"""
-        # Basic matching - can be enhanced with more sophisticated logic
-        action_lower = context.action.lower()
-        
-        # Check if rule keywords appear in action
-        rule_text = (rule.description + " " + rule.requirement).lower()
+    def _summarize_rules(self, rules: List[PolicyRule]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Count rules by category and by compliance level in one pass"""
+        by_category: Dict[str, int] = {}
+        by_level: Dict[str, int] = {}
         
-        # Simple keyword matching
-        if any(word in rule_text for word in action_lower.split()):
-            return True
+        # Few distinct (category, level) pairs, so folding them afterwards is cheap
+        pair_counts = Counter((rule.category, rule.compliance_level.value) for rule in rules)
+        for (category, level), count in pair_counts.items():
+            by_category[category] = by_category.get(category, 0) + count
+            by_level[level] = by_level.get(level, 0) + count
         
-        return False
-    
-    def _count_by_category(self, rules: List[PolicyRule]) -> Dict[str, int]:
-        """Count rules by category"""
-        counts = {}
-        for rule in rules:
-            counts[rule.category] = counts.get(rule.category, 0) + 1
-        return counts
-    
-    def _count_by_compliance_level(self, rules: List[PolicyRule]) -> Dict[str, int]:
-        """Count rules by compliance level"""
-        counts = {}
-        for rule in rules:
-            level = rule.compliance_level.value
-            counts[level] = counts.get(level, 0) + 1
-        return counts
+        return by_category, by_level
+
+
+def _rule_json_default(obj: Any) -> Any:
+    """JSON fallback that serializes PolicyRule objects via to_dict"""
+    if isinstance(obj, PolicyRule):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 
 class GRCMultiAgentSystem:
     """Main orchestrator for the GRC multi-agent system"""
     
-    def __init__(self):
-        self.governance_enforcer = GovernanceEnforcer()
+    def __init__(self, audit_log_path: Optional[str] = None):
+        self.governance_enforcer = GovernanceEnforcer(audit_log_path)
         self.sessions: Dict[str, Any] = {}
+        # Process-local cache of generated code, keyed by rule-set fingerprint
+        self._export_cache: Dict[bytes, str] = {}
     
     async def upload_policy(self, content: str, filename: str, file_type: str) -> Dict[str, Any]:
         """Upload and process a policy document"""
@@ -546,9 +850,9 @@ class GRCMultiAgentSystem:
     ) -> Dict[str, Any]:
         """Execute an action with full governance controls"""
         
-        # Create execution context
+        # Create execution context; its timestamp is reused downstream
         context = ExecutionContext(
-            request_id=hashlib.md5(f"{user_id}:{action}:{datetime.now()}".encode()).hexdigest()[:16],
+            request_id=token_hex(8),
             timestamp=datetime.now(),
             user_id=user_id,
             action=action,
@@ -581,8 +885,9 @@ class GRCMultiAgentSystem:
                 "enforcement": enforcement_result
             }
     
-    def get_audit_trail(self) -> List[Dict[str, Any]]:
-        """Get complete audit trail"""
+    def get_audit_trail(self) -> Deque[AuditEntry]:
+        """Get the in-memory audit trail, oldest first (a live view; use entry._asdict() for JSON)"""
+        # Returned without copying: the log can hold up to _AUDIT_LOG_MAXLEN entries
         return self.governance_enforcer.audit_log
     
     def export_rules_json(self) -> Dict[str, Any]:
@@ -592,11 +897,37 @@ class GRCMultiAgentSystem:
             "total_count": len(self.governance_enforcer.active_rules)
         }
     
+    def export_rules_json_bytes(self, indent: bool = False) -> bytes:
+        """Export all rules as encoded JSON, without building a list of rule dicts"""
+        active_rules = self.governance_enforcer.active_rules
+        payload = {"rules": active_rules, "total_count": len(active_rules)}
+        
+        if orjson is not None:
+            option = orjson.OPT_PASSTHROUGH_DATACLASS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(payload, default=_rule_json_default, option=option)
+        return json.dumps(
+            payload, default=_rule_json_default, indent=2 if indent else None
+        ).encode()
+    
     def export_rules_python(self) -> str:
-        """Export all rules as Python code"""
-        return self.governance_enforcer.rule_generator.generate_rule_module(
-            self.governance_enforcer.active_rules
-        )
+        """Export all rules as Python code (cached until the rule set changes)"""
+        active_rules = self.governance_enforcer.active_rules
+        
+        # Rule IDs hash the source and line text, so their order identifies the module
+        key = hashlib.blake2b(
+            "\n".join(rule.rule_id for rule in active_rules).encode(),
+            digest_size=16
+        ).digest()
+        
+        if key not in self._export_cache:
+            self._export_cache.clear()
+            self._export_cache[key] = self.governance_enforcer.rule_generator.generate_rule_module(
+                active_rules
+            )
+        
+        return self._export_cache[key]
 
 
 # Example usage
@@ -672,5 +1003,28 @@ async def main():
     )
 
 
+# Testing utilities
+def test_concurrent_rule_scans(threads: int = 4, rounds: int = 20):
+    """Check that concurrent rule prefilter scans agree with a single scan"""
+    from concurrent.futures import ThreadPoolExecutor
+    
+    content = "\n".join([
+        "1.1 Customer data must be encrypted at rest.",
+        "Quarterly review notes.",
+        "2.1 Records shall be retained for 7 years.",
+    ] * 500)
+    expected = _rule_candidate_lines(content)
+    
+    def scan_repeatedly(_):
+        return all(_rule_candidate_lines(content) == expected for _ in range(rounds))
+    
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(scan_repeatedly, range(threads)))
+    
+    assert all(results), "concurrent prefilter scans disagreed"
+    print(f"Concurrent rule scans OK ({threads} threads, "
+          f"prefilter {'on' if _RULE_PREFILTER is not None else 'off'})")
+
+
 if __name__ == "__main__":
     asyncio.run(main())
@@ -14,15 +14,16 @@ Version: 1.0.3 - All bugs fixed, fully operational
 import streamlit as st
 import asyncio
 from datetime import datetime
-import json
 import zipfile
 import io
+import hashlib
+import atexit
+import shutil
+import tempfile
+import threading
+from collections import Counter
 from pathlib import Path
 
-# Import core components
-from grc_agent_system import GRCMultiAgentSystem
-from document_processor import DocumentProcessorFactory
-
 # Page configuration
 st.set_page_config(
     page_title="Policy-to-Code Converter",
@@ -32,7 +33,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+_CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -61,19 +62,333 @@ st.markdown("""
         color: #0c5460;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# The style must be re-sent on every rerun; st.html (Streamlit 1.33+) skips the markdown parse
+if hasattr(st, "html"):
+    st.html(_CUSTOM_CSS)
+else:
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
 
 # Initialize session state
-if 'system' not in st.session_state:
-    st.session_state.system = GRCMultiAgentSystem()
 if 'rules_generated' not in st.session_state:
     st.session_state.rules_generated = False
-if 'generated_code' not in st.session_state:
-    st.session_state.generated_code = None
-if 'rules_json' not in st.session_state:
-    st.session_state.rules_json = None
+if 'generated_code_path' not in st.session_state:
+    # Generated code and JSON live on disk; the session only holds their paths
+    st.session_state.generated_code_path = None
+if 'code_preview' not in st.session_state:
+    st.session_state.code_preview = None
+if 'rules_json_path' not in st.session_state:
+    st.session_state.rules_json_path = None
 if 'policy_name' not in st.session_state:
     st.session_state.policy_name = None
+if 'generated_at' not in st.session_state:
+    st.session_state.generated_at = None
+if 'file_timestamp' not in st.session_state:
+    st.session_state.file_timestamp = None
+if 'rule_rows' not in st.session_state:
+    st.session_state.rule_rows = []
+if 'last_upload' not in st.session_state:
+    st.session_state.last_upload = None
+if 'summary' not in st.session_state:
+    st.session_state.summary = None
+if 'upload_failures' not in st.session_state:
+    st.session_state.upload_failures = []
+
+# Rules view: table columns and rows shown per page
+OVERVIEW_COLUMNS = ['rule_id', 'category', 'subcategory', 'compliance_level', 'description']
+RULES_PAGE_SIZE = 50
+
+
+@st.cache_resource
+def get_event_loop():
+    """Event loop running on a background thread, shared by every session"""
+    # Created on first processing, not per session, so idle sessions hold no loop
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+# Generated files kept on disk: code and JSON for as many upload sets as build_artifacts caches
+ARTIFACT_MAX_FILES = 64
+
+
+@st.cache_resource
+def artifact_dir():
+    """Scratch directory for generated files, shared by all sessions and removed at exit"""
+    path = Path(tempfile.mkdtemp(prefix="policy_to_code_"))
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def write_artifact(data, filename):
+    """Write one generated file to the scratch directory, replacing any earlier copy"""
+    path = artifact_dir() / filename
+    # Written aside and renamed into place, so a concurrent reader never sees a partial file
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=artifact_dir(), delete=False) as f:
+        f.write(data)
+    Path(f.name).replace(path)
+    prune_artifacts()
+    return str(path)
+
+
+def prune_artifacts():
+    """Delete the oldest generated files beyond ARTIFACT_MAX_FILES"""
+    # Only finished artifacts are candidates; in-progress temp files have no suffix
+    files = [p for p in artifact_dir().iterdir() if p.suffix in ('.py', '.json')]
+    if len(files) <= ARTIFACT_MAX_FILES:
+        return
+
+    def modified(path):
+        try:
+            return path.stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    files.sort(key=modified)
+    for path in files[:len(files) - ARTIFACT_MAX_FILES]:
+        # Another session may be pruning at the same time
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def artifacts_exist(*paths):
+    """True if every generated file is still on disk (old ones are pruned)"""
+    return all(path is not None and Path(path).is_file() for path in paths)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_artifacts(upload_key, _uploads):
+    """Process policy documents into exported code and JSON plus the rule summary"""
+    # Keyed on upload_key (hash, name and type per file); the leading underscore
+    # stops Streamlit hashing the file contents again
+    from grc_agent_system import GRCMultiAgentSystem
+
+    system = GRCMultiAgentSystem()
+
+    async def process_policy(content, filename, file_type):
+        # Text is decoded here so a cache hit skips the decode along with the parse
+        if file_type == 'text':
+            try:
+                content = content.decode('utf-8')
+            except UnicodeDecodeError:
+                # Try with different encoding
+                content = content.decode('latin-1')
+
+        # Each document is parsed on its own system; rules are registered below in upload order
+        return await GRCMultiAgentSystem().upload_policy(
+            content=content,
+            filename=filename,
+            file_type=file_type
+        )
+
+    async def process_all():
+        # PDF/Excel extraction runs in worker threads, so the documents overlap
+        return await asyncio.gather(
+            *(process_policy(*upload) for upload in _uploads),
+            return_exceptions=True
+        )
+
+    # Reuse one loop (and its default executor) instead of asyncio.run per click
+    results = asyncio.run_coroutine_threadsafe(process_all(), get_event_loop()).result()
+
+    summary = {'total_rules': 0, 'by_category': Counter(), 'by_compliance_level': Counter()}
+    failures = []
+    for (_, filename, _), result in zip(_uploads, results):
+        if isinstance(result, Exception):
+            failures.append((filename, result))
+            continue
+        system.governance_enforcer.add_rules(result['rules'])
+        summary['total_rules'] += result['summary']['total_rules']
+        summary['by_category'].update(result['summary']['by_category'])
+        summary['by_compliance_level'].update(result['summary']['by_compliance_level'])
+
+    # Nothing to show if every document failed; raising also keeps the failure out of the cache
+    if len(failures) == len(_uploads):
+        raise failures[0][1]
+    failures = [(filename, str(error)) for filename, error in failures]
+
+    # Generate code using the correct methods; JSON is encoded by orjson when installed
+    python_code = system.export_rules_python()
+    json_rules = system.export_rules_json_bytes(indent=True).decode()
+    code_preview = python_code[:2000] + "\n\n# ... (code continues) ..."
+
+    # Neither the cache nor the session keeps the full text, only where it was written.
+    # Files are named after the uploads, so rebuilding after cache eviction overwrites them.
+    artifact_id = hashlib.blake2b(repr(upload_key).encode(), digest_size=16).hexdigest()
+    code_path = write_artifact(python_code, f"{artifact_id}.py")
+    json_path = write_artifact(json_rules, f"{artifact_id}.json")
+
+    # Rule dicts for the View Rules tab, with descriptions lowercased once for search
+    rule_rows = []
+    for rule in system.governance_enforcer.active_rules:
+        row = rule.to_dict()
+        row['_desc_lc'] = rule.description.lower()
+        rule_rows.append(row)
+
+    # The system itself is dropped; only these derived results are cached
+    return summary, failures, code_path, json_path, code_preview, rule_rows
+
+
+def build_docs(policy_name, generated_at):
+    """Render the packaged README and example script for a policy"""
+    # README
+    readme_content = f"""# Policy Rules - {policy_name}
+
+Generated on: {generated_at}
+
+## Files Included
+
+1. **{policy_name}_rules.py** - Python validation module
+2. **{policy_name}_rules.json** - Structured rule definitions
+3. **README.md** - This file
+4. **example_usage.py** - Example usage code
+
+## How to Use
+
+### Python Code
+
+```python
+# Import the generated rules
+from {policy_name}_rules import *
+
+# Example: Validate a rule
+context = {{
+    'contains_pii': True,
+    'encryption_enabled': True,
+    'user_consent': True
+}}
+
+# Call validation function (replace RULE_ID with actual rule ID)
+# result = validate_RULE_ID(context)
+# print(result)
+```
+
+### JSON Rules
+
+Load and use the JSON rules in any application:
+
+```python
+import json
+
+with open('{policy_name}_rules.json', 'r') as f:
+    rules = json.load(f)
+
+for rule in rules['rules']:
+    print(f"Rule: {{rule['description']}}")
+```
+
+## Integration
+
+Include these files in your application:
+- Import the Python module for runtime validation
+- Load JSON rules for configuration
+- Use with GRC Multi-Agent System for full governance
+
+## Support
+
+For questions or issues, refer to the main documentation at:
+https://github.com/HimJoe/policyascode
+"""
+
+    # Example usage
+    example_usage = f"""#!/usr/bin/env python3
+\"\"\"
+Example Usage of Generated Policy Rules
+\"\"\"
+
+import json
+from {policy_name}_rules import *
+
+try:
+    import orjson  # Faster JSON parsing when installed
+except ImportError:
+    orjson = None
+
+# Resolve validators once at import time via the generated registry
+VALIDATORS = dict(COMPLIANCE_RULES)
+
+def main():
+    print("=" * 60)
+    print("Policy Rules Validation Example")
+    print("=" * 60)
+
+    # Load JSON rules
+    if orjson is not None:
+        with open('{policy_name}_rules.json', 'rb') as f:
+            rules_data = orjson.loads(f.read())
+    else:
+        with open('{policy_name}_rules.json', 'r') as f:
+            rules_data = json.load(f)
+
+    print(f"\\nTotal Rules Loaded: {{len(rules_data['rules'])}}")
+
+    # Example validation context
+    example_context = {{
+        'user_id': 'user_123',
+        'action': 'process_data',
+        'contains_pii': True,
+        'encryption_enabled': True,
+        'user_consent': True,
+        'approval_obtained': True
+    }}
+
+    print("\\nExample Context:")
+    print(json.dumps(example_context, indent=2))
+
+    # Iterate through rules and validate
+    print("\\nValidation Results:")
+    print("-" * 60)
+
+    for rule in rules_data['rules']:
+        rule_id = rule['rule_id']
+        validator = VALIDATORS.get(rule_id)
+
+        # Check if validation function exists
+        if validator is not None:
+            result = validator(example_context)
+            status = "✅ PASSED" if result['passed'] else "❌ FAILED"
+            print(f"{{status}} - {{rule['description'][:60]}}")
+
+            if not result['passed']:
+                for violation in result.get('violations', []):
+                    print(f"    ⚠️  {{violation}}")
+        else:
+            print(f"⚠️  Function validate_{{rule_id}} not found")
+
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
+"""
+
+    return readme_content, example_usage
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_zip(policy_name, code_path, json_path, generated_at):
+    """Build the ZIP package once per set of artifacts instead of on every rerun"""
+    python_code = Path(code_path).read_bytes()
+    rules_json = Path(json_path).read_bytes()
+
+    zip_buffer = io.BytesIO()
+    # Deflate level 1 compresses about twice as fast as the default 6; the archive stays small
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
+        # Add Python code
+        zip_file.writestr(f"{policy_name}_rules.py", python_code)
+
+        # Add JSON rules
+        zip_file.writestr(f"{policy_name}_rules.json", rules_json)
+
+        # Add README and example usage
+        readme_content, example_usage = build_docs(policy_name, generated_at)
+        zip_file.writestr("README.md", readme_content)
+        zip_file.writestr("example_usage.py", example_usage)
+
+    return zip_buffer.getvalue()
+
 
 # Header
 st.markdown('<div class="main-header">📜 Policy-to-Code Converter</div>', unsafe_allow_html=True)
@@ -128,17 +443,11 @@ with st.sidebar:
 
     st.header("📊 Statistics")
     if st.session_state.rules_generated:
-        system = st.session_state.system
-        total_rules = len(system.governance_enforcer.active_rules)
-        st.metric("Total Rules Extracted", total_rules)
+        summary = st.session_state.summary
+        st.metric("Total Rules Extracted", summary['total_rules'])
 
-        # Count by category
-        categories = {}
-        for rule in system.governance_enforcer.active_rules:
-            cat = rule.category  # Access attribute directly
-            categories[cat] = categories.get(cat, 0) + 1
-
-        for cat, count in categories.items():
+        # Counted once when the rules were generated
+        for cat, count in summary['by_category'].items():
             st.metric(f"{cat} Rules", count)
 
 # Main content area
@@ -150,76 +459,97 @@ with tab1:
     col1, col2 = st.columns([2, 1])
 
     with col1:
-        uploaded_file = st.file_uploader(
-            "Choose a policy document",
+        uploaded_files = st.file_uploader(
+            "Choose policy documents",
             type=['txt', 'pdf', 'xlsx', 'xls'],
-            help="Upload your policy document in PDF, Text, or Excel format"
+            accept_multiple_files=True,
+            help="Upload one or more policy documents in PDF, Text, or Excel format"
         )
 
     with col2:
         st.markdown("### File Info")
-        if uploaded_file is not None:
+        for uploaded_file in uploaded_files:
             st.success(f"**Name:** {uploaded_file.name}")
             st.info(f"**Size:** {uploaded_file.size / 1024:.2f} KB")
             st.info(f"**Type:** {uploaded_file.type}")
 
-    if uploaded_file is not None:
+    if uploaded_files:
         st.markdown("---")
 
         if st.button("🚀 Process Policy Document", type="primary", use_container_width=True):
-            with st.spinner("Processing your policy document... This may take a moment."):
+            with st.spinner("Processing your policy documents... This may take a moment."):
                 try:
-                    # Read file content
-                    file_bytes = uploaded_file.read()
-
-                    # Determine file type and prepare content
-                    file_extension = Path(uploaded_file.name).suffix.lower()
-                    if file_extension == '.pdf':
-                        file_type = 'pdf'
-                        content = file_bytes  # Keep as bytes for PDF
-                    elif file_extension in ['.xlsx', '.xls']:
-                        file_type = 'excel'
-                        content = file_bytes  # Keep as bytes for Excel
+                    # Uploads are already in memory; getvalue() shares that buffer instead of copying it
+                    uploads = []
+                    for uploaded_file in uploaded_files:
+                        # Determine file type; text is decoded inside build_artifacts
+                        file_extension = Path(uploaded_file.name).suffix.lower()
+                        if file_extension == '.pdf':
+                            file_type = 'pdf'
+                        elif file_extension in ['.xlsx', '.xls']:
+                            file_type = 'excel'
+                        else:
+                            file_type = 'text'
+                        uploads.append((uploaded_file.getvalue(), uploaded_file.name, file_type))
+
+                    # Re-submitting the same uploads reuses the artifacts already in the session.
+                    # Names are part of the key because rule ids embed the source name.
+                    upload_key = tuple(
+                        (hashlib.blake2b(file_bytes, digest_size=16).hexdigest(), filename, file_type)
+                        for file_bytes, filename, file_type in uploads
+                    )
+
+                    if (st.session_state.rules_generated and st.session_state.last_upload == upload_key
+                            and artifacts_exist(st.session_state.generated_code_path,
+                                                st.session_state.rules_json_path)):
+                        summary = st.session_state.summary
+                        failures = st.session_state.upload_failures
                     else:
-                        file_type = 'text'
-                        # Decode text files to string
-                        try:
-                            content = file_bytes.decode('utf-8')
-                        except UnicodeDecodeError:
-                            # Try with different encoding
-                            content = file_bytes.decode('latin-1')
-
-                    # Process the policy
-                    async def process_policy():
-                        return await st.session_state.system.upload_policy(
-                            content=content,
-                            filename=uploaded_file.name,
-                            file_type=file_type
+                        # Process the policies together (cached by content hash across reruns)
+                        summary, failures, code_path, json_path, code_preview, rule_rows = build_artifacts(
+                            upload_key, uploads
                         )
-
-                    result = asyncio.run(process_policy())
-
-                    # Store policy name
-                    st.session_state.policy_name = uploaded_file.name.replace('.', '_').replace(' ', '_')
-
-                    # Generate code using the correct methods
-                    python_code = st.session_state.system.export_rules_python()
-                    json_rules_dict = st.session_state.system.export_rules_json()
-                    json_rules = json.dumps(json_rules_dict, indent=2)
-
-                    st.session_state.generated_code = python_code
-                    st.session_state.rules_json = json_rules
-                    st.session_state.rules_generated = True
+                        if not artifacts_exist(code_path, json_path):
+                            # A cached entry can outlive its pruned files; rebuild just this one
+                            build_artifacts.clear(upload_key, uploads)
+                            summary, failures, code_path, json_path, code_preview, rule_rows = build_artifacts(
+                                upload_key, uploads
+                            )
+
+                        # Store policy name; several documents are packaged under one name
+                        if len(uploads) == 1:
+                            st.session_state.policy_name = uploads[0][1].replace('.', '_').replace(' ', '_')
+                        else:
+                            st.session_state.policy_name = "policy_bundle"
+
+                        st.session_state.generated_code_path = code_path
+                        # Sliced once at generation rather than on every render of the download tab
+                        st.session_state.code_preview = code_preview
+                        st.session_state.rules_json_path = json_path
+                        st.session_state.rule_rows = rule_rows
+                        st.session_state.rules_generated = True
+                        # Download names carry the generation time, not the time of each rerun
+                        generated = datetime.now()
+                        st.session_state.generated_at = generated.strftime("%Y-%m-%d %H:%M:%S")
+                        st.session_state.file_timestamp = generated.strftime("%Y%m%d_%H%M%S")
+                        st.session_state.last_upload = upload_key
+                        st.session_state.summary = summary
+                        st.session_state.upload_failures = failures
+
+                    for filename, error in failures:
+                        st.warning(f"Skipped {filename}: {error}")
+
+                    processed = ", ".join(filename for _, filename, _ in uploads)
 
                     # Success message
                     st.markdown(f"""
                     <div class="success-box">
                     <h3>✅ Success!</h3>
-                    <p><strong>Processed:</strong> {uploaded_file.name}</p>
-                    <p><strong>Rules Extracted:</strong> {result['summary']['total_rules']}</p>
-                    <p><strong>Governance Rules:</strong> {result['summary']['by_category'].get('Governance', 0)}</p>
-                    <p><strong>Risk Rules:</strong> {result['summary']['by_category'].get('Risk', 0)}</p>
-                    <p><strong>Compliance Rules:</strong> {result['summary']['by_category'].get('Compliance', 0)}</p>
+                    <p><strong>Processed:</strong> {processed}</p>
+                    <p><strong>Rules Extracted:</strong> {summary['total_rules']}</p>
+                    <p><strong>Governance Rules:</strong> {summary['by_category'].get('Governance', 0)}</p>
+                    <p><strong>Risk Rules:</strong> {summary['by_category'].get('Risk', 0)}</p>
+                    <p><strong>Compliance Rules:</strong> {summary['by_category'].get('Compliance', 0)}</p>
                     </div>
                     """, unsafe_allow_html=True)
 
@@ -237,52 +567,80 @@ with tab2:
     if not st.session_state.rules_generated:
         st.info("📤 Please upload and process a policy document first (see 'Upload Policy' tab)")
     else:
-        system = st.session_state.system
-        # Get rules from active_rules and convert to dicts
-        rules_objects = system.governance_enforcer.active_rules
-        rules = [rule.to_dict() for rule in rules_objects]
+        # Rule dicts built once when the document was processed
+        rules = st.session_state.rule_rows
 
         if not rules:
             st.warning("No rules were extracted from the document.")
         else:
-            # Filter options
-            col1, col2, col3 = st.columns(3)
+            # Filter options; inside a form they only apply on submit, not per keystroke
+            with st.form("rule_filters"):
+                col1, col2, col3 = st.columns(3)
+
+                with col1:
+                    categories = list(set(r.get('category', 'Unknown') for r in rules))
+                    selected_category = st.selectbox("Filter by Category", ["All"] + categories)
 
-            with col1:
-                categories = list(set(r.get('category', 'Unknown') for r in rules))
-                selected_category = st.selectbox("Filter by Category", ["All"] + categories)
+                with col2:
+                    levels = list(set(r.get('compliance_level', 'Unknown') for r in rules))
+                    selected_level = st.selectbox("Filter by Compliance Level", ["All"] + levels)
 
-            with col2:
-                levels = list(set(r.get('compliance_level', 'Unknown') for r in rules))
-                selected_level = st.selectbox("Filter by Compliance Level", ["All"] + levels)
+                with col3:
+                    search = st.text_input("Search rules", placeholder="Enter keywords...")
 
-            with col3:
-                search = st.text_input("Search rules", placeholder="Enter keywords...")
+                st.form_submit_button("🔍 Apply Filters")
 
-            # Filter rules
-            filtered_rules = rules
-            if selected_category != "All":
-                filtered_rules = [r for r in filtered_rules if r.get('category') == selected_category]
-            if selected_level != "All":
-                filtered_rules = [r for r in filtered_rules if r.get('compliance_level') == selected_level]
-            if search:
-                filtered_rules = [r for r in filtered_rules if search.lower() in r.get('description', '').lower()]
+            # Filter rules in a single pass
+            search_lower = search.lower() if search else None
+            filtered_rules = [
+                r for r in rules
+                if (selected_category == "All" or r.get('category') == selected_category)
+                and (selected_level == "All" or r.get('compliance_level') == selected_level)
+                and (search_lower is None or search_lower in r['_desc_lc'])
+            ]
 
             st.info(f"Showing {len(filtered_rules)} of {len(rules)} rules")
 
-            # Display rules
-            for idx, rule in enumerate(filtered_rules, 1):
-                with st.expander(f"Rule {idx}: {rule.get('description', 'No description')[:100]}..."):
+            if filtered_rules:
+                # One table per page of rules instead of an expander per rule
+                page_count = (len(filtered_rules) + RULES_PAGE_SIZE - 1) // RULES_PAGE_SIZE
+                page = 1
+                if page_count > 1:
+                    page = st.number_input("Page", min_value=1, max_value=page_count, value=1)
+                start = (page - 1) * RULES_PAGE_SIZE
+                page_rules = filtered_rules[start:start + RULES_PAGE_SIZE]
+
+                st.dataframe(
+                    [{column: rule.get(column) for column in OVERVIEW_COLUMNS} for rule in page_rules],
+                    use_container_width=True,
+                    hide_index=True
+                )
+
+                # Full details only for the selected rule
+                selected = st.selectbox(
+                    "Rule details",
+                    range(len(page_rules)),
+                    format_func=lambda i: f"Rule {start + i + 1}: {page_rules[i].get('description', 'No description')[:100]}"
+                )
+                idx = start + selected + 1
+                rule = page_rules[selected]
+
+                with st.expander(f"Rule {idx}: {rule.get('description', 'No description')[:100]}...", expanded=True):
                     col1, col2 = st.columns(2)
 
+                    # One markdown element per column; trailing double spaces are line breaks
                     with col1:
-                        st.markdown(f"**Rule ID:** `{rule.get('rule_id', 'N/A')}`")
-                        st.markdown(f"**Category:** {rule.get('category', 'N/A')}")
-                        st.markdown(f"**Subcategory:** {rule.get('subcategory', 'N/A')}")
+                        st.markdown(
+                            f"**Rule ID:** `{rule.get('rule_id', 'N/A')}`  \n"
+                            f"**Category:** {rule.get('category', 'N/A')}  \n"
+                            f"**Subcategory:** {rule.get('subcategory', 'N/A')}"
+                        )
 
                     with col2:
-                        st.markdown(f"**Compliance Level:** `{rule.get('compliance_level', 'N/A')}`")
-                        st.markdown(f"**Requirement:** {rule.get('requirement', 'N/A')}")
+                        st.markdown(
+                            f"**Compliance Level:** `{rule.get('compliance_level', 'N/A')}`  \n"
+                            f"**Requirement:** {rule.get('requirement', 'N/A')}"
+                        )
 
                     st.markdown("**Description:**")
                     st.info(rule.get('description', 'No description available'))
@@ -296,16 +654,18 @@ with tab3:
 
     if not st.session_state.rules_generated:
         st.info("📤 Please upload and process a policy document first (see 'Upload Policy' tab)")
+    elif not artifacts_exist(st.session_state.generated_code_path, st.session_state.rules_json_path):
+        st.warning("⚠️ The generated files have expired. Process the policy document again to download them.")
     else:
         st.success("✅ Your code is ready for download!")
 
-        # Generate timestamp for filenames
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Timestamp for filenames, fixed when the code was generated
+        timestamp = st.session_state.file_timestamp
         policy_name = st.session_state.policy_name or "policy"
 
         # Show code preview
         st.markdown("### 📄 Python Code Preview")
-        st.code(st.session_state.generated_code[:2000] + "\n\n# ... (code continues) ...", language="python")
+        st.code(st.session_state.code_preview, language="python")
 
         st.markdown("---")
 
@@ -316,7 +676,7 @@ with tab3:
             st.markdown("### 🐍 Python Code")
             st.download_button(
                 label="⬇️ Download Python File",
-                data=st.session_state.generated_code,
+                data=Path(st.session_state.generated_code_path).read_bytes(),
                 file_name=f"{policy_name}_rules_{timestamp}.py",
                 mime="text/x-python",
                 use_container_width=True
@@ -327,7 +687,7 @@ with tab3:
             st.markdown("### 📋 JSON Rules")
             st.download_button(
                 label="⬇️ Download JSON File",
-                data=st.session_state.rules_json,
+                data=Path(st.session_state.rules_json_path).read_bytes(),
                 file_name=f"{policy_name}_rules_{timestamp}.json",
                 mime="application/json",
                 use_container_width=True
@@ -337,140 +697,17 @@ with tab3:
         with col3:
             st.markdown("### 📦 Complete Package")
 
-            # Create ZIP file with all assets
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                # Add Python code
-                zip_file.writestr(f"{policy_name}_rules.py", st.session_state.generated_code)
-
-                # Add JSON rules
-                zip_file.writestr(f"{policy_name}_rules.json", st.session_state.rules_json)
-
-                # Add README
-                readme_content = f"""# Policy Rules - {policy_name}
-
-Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-
-## Files Included
-
-1. **{policy_name}_rules.py** - Python validation module
-2. **{policy_name}_rules.json** - Structured rule definitions
-3. **README.md** - This file
-4. **example_usage.py** - Example usage code
-
-## How to Use
-
-### Python Code
-
-```python
-# Import the generated rules
-from {policy_name}_rules import *
-
-# Example: Validate a rule
-context = {{
-    'contains_pii': True,
-    'encryption_enabled': True,
-    'user_consent': True
-}}
-
-# Call validation function (replace RULE_ID with actual rule ID)
-# result = validate_RULE_ID(context)
-# print(result)
-```
-
-### JSON Rules
-
-Load and use the JSON rules in any application:
-
-```python
-import json
-
-with open('{policy_name}_rules.json', 'r') as f:
-    rules = json.load(f)
-
-for rule in rules['rules']:
-    print(f"Rule: {{rule['description']}}")
-```
-
-## Integration
-
-Include these files in your application:
-- Import the Python module for runtime validation
-- Load JSON rules for configuration
-- Use with GRC Multi-Agent System for full governance
-
-## Support
-
-For questions or issues, refer to the main documentation at:
-https://github.com/HimJoe/policyascode
-"""
-                zip_file.writestr("README.md", readme_content)
-
-                # Add example usage
-                example_usage = f"""#!/usr/bin/env python3
-\"\"\"
-Example Usage of Generated Policy Rules
-\"\"\"
-
-import json
-from {policy_name}_rules import *
-
-def main():
-    print("=" * 60)
-    print("Policy Rules Validation Example")
-    print("=" * 60)
-
-    # Load JSON rules
-    with open('{policy_name}_rules.json', 'r') as f:
-        rules_data = json.load(f)
-
-    print(f"\\nTotal Rules Loaded: {{len(rules_data['rules'])}}")
-
-    # Example validation context
-    example_context = {{
-        'user_id': 'user_123',
-        'action': 'process_data',
-        'contains_pii': True,
-        'encryption_enabled': True,
-        'user_consent': True,
-        'approval_obtained': True
-    }}
-
-    print("\\nExample Context:")
-    print(json.dumps(example_context, indent=2))
-
-    # Iterate through rules and validate
-    print("\\nValidation Results:")
-    print("-" * 60)
-
-    for rule in rules_data['rules']:
-        rule_id = rule['rule_id']
-        func_name = f"validate_{{rule_id}}"
-
-        # Check if validation function exists
-        if func_name in globals():
-            result = globals()[func_name](example_context)
-            status = "✅ PASSED" if result['passed'] else "❌ FAILED"
-            print(f"{{status}} - {{rule['description'][:60]}}")
-
-            if not result['passed']:
-                for violation in result.get('violations', []):
-                    print(f"    ⚠️  {{violation}}")
-        else:
-            print(f"⚠️  Function {{func_name}} not found")
-
-    print("=" * 60)
-
-if __name__ == "__main__":
-    main()
-"""
-                zip_file.writestr("example_usage.py", example_usage)
-
-            zip_buffer.seek(0)
+            # Create ZIP file with all assets (cached across reruns)
+            zip_bytes = build_zip(
+                policy_name,
+                st.session_state.generated_code_path,
+                st.session_state.rules_json_path,
+                st.session_state.generated_at
+            )
 
             st.download_button(
                 label="⬇️ Download ZIP Package",
-                data=zip_buffer,
+                data=zip_bytes,
                 file_name=f"{policy_name}_package_{timestamp}.zip",
                 mime="application/zip",
                 use_container_width=True
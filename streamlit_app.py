@@ -9,13 +9,21 @@ import json
 from datetime import datetime
 import sys
 import os
+import hashlib
+import io
+import threading
+from collections import defaultdict, deque
 
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Add parent directory to path once; Streamlit re-executes this module on every rerun
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
 
-from grc_agent_system import GRCMultiAgentSystem, ExecutionContext
-from document_processor import DocumentProcessorFactory
-import tempfile
+
+try:
+    import orjson  # Faster JSON serialization when installed
+except ImportError:
+    orjson = None
 
 
 # Page config
@@ -27,7 +35,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+_CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -64,23 +72,177 @@ st.markdown("""
         margin: 0.5rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# The style must be re-sent on every rerun; st.html (Streamlit 1.33+) skips the markdown parse
+if hasattr(st, "html"):
+    st.html(_CUSTOM_CSS)
+else:
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
+
+
+# Rules rendered per page on the Rule Generation page
+RULES_PAGE_SIZE = 25
+# Governance results kept per session; older entries drop off the front
+AUDIT_TRAIL_MAXLEN = 1000
+
+
+def get_grc_system():
+    """This session's GRC system, created on first use"""
+    # Rules and enforcer state are per user, so the system lives in session state
+    if 'grc_system' not in st.session_state:
+        from grc_agent_system import GRCMultiAgentSystem
+        st.session_state.grc_system = GRCMultiAgentSystem()
+    return st.session_state.grc_system
+
+
+@st.cache_resource
+def get_event_loop():
+    """Event loop running on a background thread, shared by every session"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
 
 
-# Initialize session state
-if 'grc_system' not in st.session_state:
-    st.session_state.grc_system = GRCMultiAgentSystem()
+def run_async(coro):
+    """Run a coroutine on the shared event loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+# Initialize per-user session state
 if 'loaded_policies' not in st.session_state:
     st.session_state.loaded_policies = []
+if 'last_test_result' not in st.session_state:
+    st.session_state.last_test_result = None
+if 'policy_fps' not in st.session_state:
+    # (fingerprint, filename) of every document this session has loaded
+    st.session_state.policy_fps = set()
 if 'audit_trail' not in st.session_state:
-    st.session_state.audit_trail = []
+    st.session_state.audit_trail = deque(maxlen=AUDIT_TRAIL_MAXLEN)
+if 'audit_stats' not in st.session_state:
+    # Running totals over the entries in audit_trail so analytics never rescans it
+    st.session_state.audit_stats = {'approved': 0, 'risk_total': 0.0}
+if 'audit_view' not in st.session_state:
+    # Render-ready labels and parameter JSON, kept in step with audit_trail
+    st.session_state.audit_view = deque(maxlen=AUDIT_TRAIL_MAXLEN)
 if 'generated_rules' not in st.session_state:
     st.session_state.generated_rules = None
+if 'rule_json_cache' not in st.session_state:
+    # Serialized rule JSON by rule id; bounded by the rules this session has loaded
+    st.session_state.rule_json_cache = {}
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def parse_document(fingerprint, _upload, file_ext):
+    """Extract the text of an uploaded document, cached by content fingerprint"""
+    # Imported on first upload; the PDF/Excel processors are not needed before that
+    from document_processor import DocumentProcessorFactory
+    
+    # The leading underscore keeps Streamlit from hashing the upload itself;
+    # the in-memory upload is read directly, with no temp file round trip
+    return DocumentProcessorFactory.process_stream(_upload, file_ext)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def extract_rules(fingerprint, _content, filename):
+    """Extract rules from document text, cached by content fingerprint and file name"""
+    from grc_agent_system import GRCMultiAgentSystem
+    
+    # Parsed on a scratch system; callers register the rules on their own system.
+    # The text is already extracted, so it is always parsed as plain text.
+    return run_async(GRCMultiAgentSystem().upload_policy(_content, filename, 'text'))
+
+
+def register_rules(rules):
+    """Activate a document's rules on this session's system"""
+    get_grc_system().governance_enforcer.add_rules(rules)
+
+
+def get_rule_filter_index(rules):
+    """Positions of active rules by category and by compliance level"""
+    # Rules are only ever appended, so the index is rebuilt only when the count changes
+    cached = st.session_state.get('rule_filter_index')
+    if cached is not None and cached[0] == len(rules):
+        return cached[1], cached[2]
+    
+    by_category = defaultdict(list)
+    by_level = defaultdict(list)
+    for position, rule in enumerate(rules):
+        by_category[rule.category].append(position)
+        by_level[rule.compliance_level.value].append(position)
+    st.session_state.rule_filter_index = (len(rules), by_category, by_level)
+    return by_category, by_level
+
+
+def to_json(obj):
+    """Compact JSON text, encoded by orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def rule_json(rule):
+    """JSON for a rule and for each of its constraints, serialized once per rule"""
+    # st.json passes strings through instead of serializing the object on every rerun
+    cache = st.session_state.rule_json_cache
+    entry = cache.get(rule.rule_id)
+    if entry is None:
+        entry = cache[rule.rule_id] = (
+            to_json(rule.to_dict()),
+            [to_json(constraint) for constraint in rule.constraints]
+        )
+    return entry
+
+
+def record_audit_entry(result):
+    """Append a governance result to the audit trail and update its running totals"""
+    audit_trail = st.session_state.audit_trail
+    stats = st.session_state.audit_stats
+    
+    # A full trail drops its oldest entry, so take it out of the totals first
+    if len(audit_trail) == audit_trail.maxlen:
+        evicted = audit_trail[0]
+        stats['approved'] -= evicted['status'] == 'approved'
+        stats['risk_total'] -= evicted['enforcement']['risk_score']
+    
+    audit_trail.append(result)
+    stats['approved'] += result['status'] == 'approved'
+    stats['risk_total'] += result['enforcement']['risk_score']
+    
+    # Format the expander label and parameters once instead of on every rerun
+    context = result['context']
+    st.session_state.audit_view.append({
+        'icon': '✅' if result['status'] == 'approved' else '❌',
+        'label': f"{context.action} - {context.timestamp.strftime('%Y-%m-%d %H:%M:%S')}",
+        'status_color': "green" if result['status'] == 'approved' else "red",
+        'params_json': to_json(context.parameters)
+    })
+
+
+def audit_export_ndjson(audit_trail):
+    """Audit trail as newline-delimited JSON, encoded one entry at a time"""
+    buffer = io.BytesIO()
+    for entry in audit_trail:
+        context = entry['context']
+        record = {
+            'timestamp': context.timestamp.isoformat(),
+            'request_id': context.request_id,
+            'user_id': context.user_id,
+            'action': context.action,
+            'status': entry['status'],
+            'risk_score': entry['enforcement']['risk_score'],
+            'violations': entry['enforcement']['validation']['violations']
+        }
+        buffer.write(orjson.dumps(record) if orjson is not None else json.dumps(record).encode())
+        buffer.write(b'\n')
+    return buffer.getvalue()
 
 
 def main():
     """Main application"""
     
+    grc_system = get_grc_system()
+    
     # Header
     st.markdown('<div class="main-header">🔐 GRC Multi-Agent Governance System</div>', unsafe_allow_html=True)
     st.markdown("---")
@@ -98,7 +260,7 @@ def main():
         st.markdown("### System Status")
         st.metric("Loaded Policies", len(st.session_state.loaded_policies))
         st.metric("Active Rules", 
-                 len(st.session_state.grc_system.governance_enforcer.active_rules))
+                 len(grc_system.governance_enforcer.active_rules))
         st.metric("Audit Entries", len(st.session_state.audit_trail))
     
     # Main content
@@ -145,71 +307,79 @@ def policy_upload_page():
         
         # Process button
         if st.button("🔄 Process Policy Document", type="primary"):
-            with st.spinner("Processing policy document..."):
+            result = None
+            with st.status("Processing policy document...", expanded=True) as status:
                 try:
-                    # Save uploaded file temporarily
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
-                        tmp_file.write(uploaded_file.getvalue())
-                        tmp_path = tmp_file.name
-                    
-                    # Determine file type
-                    file_ext = uploaded_file.name.split('.')[-1].lower()
-                    
-                    # Process document
-                    content = DocumentProcessorFactory.process_file(tmp_path, file_ext)
-                    
-                    # Upload to GRC system
-                    result = asyncio.run(
-                        st.session_state.grc_system.upload_policy(
-                            content, 
-                            uploaded_file.name, 
-                            file_ext
-                        )
-                    )
-                    
-                    # Store results
-                    st.session_state.loaded_policies.append({
-                        'filename': uploaded_file.name,
-                        'timestamp': datetime.now().isoformat(),
-                        'rules_count': result['summary']['total_rules'],
-                        'result': result
-                    })
-                    
-                    st.session_state.generated_rules = result
-                    
-                    # Clean up temp file
-                    os.unlink(tmp_path)
-                    
-                    # Display results
-                    st.success("✅ Policy processed successfully!")
+                    # Hash the upload's buffer in place rather than copying it out
+                    with uploaded_file.getbuffer() as file_view:
+                        fingerprint = hashlib.blake2b(file_view, digest_size=16).hexdigest()
                     
-                    # Summary metrics
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    with col1:
-                        st.metric("Total Rules", result['summary']['total_rules'])
-                    with col2:
-                        governance_count = result['summary']['by_category'].get('Governance', 0)
-                        st.metric("Governance", governance_count)
-                    with col3:
-                        risk_count = result['summary']['by_category'].get('Risk', 0)
-                        st.metric("Risk", risk_count)
-                    with col4:
-                        compliance_count = result['summary']['by_category'].get('Compliance', 0)
-                        st.metric("Compliance", compliance_count)
-                    
-                    # Show sample rules
-                    st.markdown("### 📋 Extracted Rules (Sample)")
-                    
-                    for i, rule in enumerate(result['rules'][:5], 1):
-                        with st.expander(f"Rule {i}: {rule.description[:60]}..."):
-                            st.json(rule.to_dict())
-                    
-                    if len(result['rules']) > 5:
-                        st.info(f"... and {len(result['rules']) - 5} more rules")
+                    # Names are part of the key because rule ids embed the source name
+                    upload_key = (fingerprint, uploaded_file.name)
                     
+                    if upload_key in st.session_state.policy_fps:
+                        status.update(label="Already loaded", state="complete")
+                        st.info(f"{uploaded_file.name} has already been loaded; its rules are active.")
+                    else:
+                        # Determine file type
+                        file_ext = uploaded_file.name.split('.')[-1].lower()
+                        
+                        # Parsing and extraction are cached on the content fingerprint,
+                        # so a document another session loaded skips straight to registration
+                        content = parse_document(fingerprint, uploaded_file, file_ext)
+                        status.write(f"Parsed {len(content):,} characters of text")
+                        
+                        result = extract_rules(fingerprint, content, uploaded_file.name)
+                        status.write(f"Extracted {result['summary']['total_rules']} rules")
+                        
+                        register_rules(result['rules'])
+                        status.write("Activated rules for governance checks")
+                        st.session_state.policy_fps.add(upload_key)
+                        
+                        # Store results
+                        st.session_state.loaded_policies.append({
+                            'filename': uploaded_file.name,
+                            'fingerprint': fingerprint,
+                            'timestamp': datetime.now().isoformat(),
+                            'rules_count': result['summary']['total_rules'],
+                            'result': result
+                        })
+                        
+                        st.session_state.generated_rules = result
+                        status.update(label="Policy processed", state="complete", expanded=False)
+                
                 except Exception as e:
+                    status.update(label="Processing failed", state="error")
                     st.error(f"Error processing document: {str(e)}")
+            
+            if result is not None:
+                # Display results
+                st.success("✅ Policy processed successfully!")
+                
+                # Summary metrics
+                col1, col2, col3, col4 = st.columns(4)
+                
+                with col1:
+                    st.metric("Total Rules", result['summary']['total_rules'])
+                with col2:
+                    governance_count = result['summary']['by_category'].get('Governance', 0)
+                    st.metric("Governance", governance_count)
+                with col3:
+                    risk_count = result['summary']['by_category'].get('Risk', 0)
+                    st.metric("Risk", risk_count)
+                with col4:
+                    compliance_count = result['summary']['by_category'].get('Compliance', 0)
+                    st.metric("Compliance", compliance_count)
+                
+                # Show sample rules
+                st.markdown("### 📋 Extracted Rules (Sample)")
+                
+                for i, rule in enumerate(result['rules'][:5], 1):
+                    with st.expander(f"Rule {i}: {rule.description[:60]}..."):
+                        st.json(rule_json(rule)[0])
+                
+                if len(result['rules']) > 5:
+                    st.info(f"... and {len(result['rules']) - 5} more rules")
     
     # Show loaded policies
     if st.session_state.loaded_policies:
@@ -225,9 +395,11 @@ def policy_upload_page():
 def rule_generation_page():
     """Generated rules viewing and export page"""
     
+    grc_system = get_grc_system()
+    
     st.markdown('<div class="sub-header">⚙️ Generated Compliance Rules</div>', unsafe_allow_html=True)
     
-    if not st.session_state.grc_system.governance_enforcer.active_rules:
+    if not grc_system.governance_enforcer.active_rules:
         st.warning("No rules loaded yet. Please upload a policy document first.")
         return
     
@@ -238,17 +410,18 @@ def rule_generation_page():
     
     with col1:
         if st.button("📄 Export as JSON", use_container_width=True):
-            json_export = st.session_state.grc_system.export_rules_json()
+            # Encoded straight from the rule objects (orjson when installed)
+            json_export = grc_system.export_rules_json_bytes(indent=True)
             st.download_button(
                 label="⬇️ Download JSON",
-                data=json.dumps(json_export, indent=2),
+                data=json_export,
                 file_name=f"grc_rules_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                 mime="application/json"
             )
     
     with col2:
         if st.button("🐍 Export as Python", use_container_width=True):
-            python_code = st.session_state.grc_system.export_rules_python()
+            python_code = grc_system.export_rules_python()
             st.download_button(
                 label="⬇️ Download Python",
                 data=python_code,
@@ -276,16 +449,36 @@ def rule_generation_page():
             default=['mandatory', 'required', 'recommended', 'optional']
         )
     
-    # Get filtered rules
-    filtered_rules = [
-        rule for rule in st.session_state.grc_system.governance_enforcer.active_rules
-        if rule.category in category_filter and rule.compliance_level.value in level_filter
+    # Get filtered rules by intersecting the cached category and level indexes
+    active_rules = grc_system.governance_enforcer.active_rules
+    rule_count = len(active_rules)
+    by_category, by_level = get_rule_filter_index(active_rules)
+    category_set = frozenset(category_filter)
+    level_set = frozenset(level_filter)
+    
+    # A filter that selects every indexed value excludes nothing, so the
+    # default view skips building position sets altogether
+    constraints = [
+        set().union(*(index.get(value, ()) for value in selected))
+        for index, selected in ((by_category, category_set), (by_level, level_set))
+        if not index.keys() <= selected
     ]
-    
-    st.info(f"Showing {len(filtered_rules)} of {len(st.session_state.grc_system.governance_enforcer.active_rules)} rules")
-    
-    # Display rules
-    for i, rule in enumerate(filtered_rules, 1):
+    if constraints:
+        positions = set.intersection(*constraints)
+        filtered_rules = [active_rules[i] for i in sorted(positions)]
+    else:
+        filtered_rules = active_rules[:rule_count]
+    
+    st.info(f"Showing {len(filtered_rules)} of {rule_count} rules")
+    
+    # Display one page of rules; only those are rendered
+    page_count = (len(filtered_rules) + RULES_PAGE_SIZE - 1) // RULES_PAGE_SIZE
+    page = 1
+    if page_count > 1:
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1)
+    start = (page - 1) * RULES_PAGE_SIZE
+    
+    for i, rule in enumerate(filtered_rules[start:start + RULES_PAGE_SIZE], start + 1):
         with st.expander(f"Rule {i}: {rule.description[:80]}..."):
             col1, col2 = st.columns(2)
             
@@ -303,16 +496,18 @@ def rule_generation_page():
             
             if rule.constraints:
                 st.markdown("**Constraints:**")
-                for constraint in rule.constraints:
-                    st.json(constraint)
+                for constraint_json in rule_json(rule)[1]:
+                    st.json(constraint_json)
 
 
 def governance_testing_page():
     """Test governance enforcement page"""
     
+    grc_system = get_grc_system()
+    
     st.markdown('<div class="sub-header">⚖️ Governance Enforcement Testing</div>', unsafe_allow_html=True)
     
-    if not st.session_state.grc_system.governance_enforcer.active_rules:
+    if not grc_system.governance_enforcer.active_rules:
         st.warning("No rules loaded yet. Please upload a policy document first.")
         return
     
@@ -365,8 +560,8 @@ def governance_testing_page():
             }
             
             # Execute governance check
-            result = asyncio.run(
-                st.session_state.grc_system.execute_with_governance(
+            result = run_async(
+                grc_system.execute_with_governance(
                     user_id=user_id,
                     action=action,
                     parameters=parameters
@@ -374,43 +569,70 @@ def governance_testing_page():
             )
             
             # Store in audit trail
-            st.session_state.audit_trail.append(result)
-            
-            # Display results
-            st.markdown("---")
-            st.markdown("### 📊 Governance Decision")
-            
-            if result['status'] == 'approved':
-                st.success("✅ **ACTION APPROVED**")
-                st.markdown(f'<div class="approved">Status: APPROVED</div>', unsafe_allow_html=True)
-            else:
-                st.error("❌ **ACTION BLOCKED**")
-                st.markdown(f'<div class="blocked">Status: BLOCKED</div>', unsafe_allow_html=True)
-            
-            # Metrics
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("Risk Score", f"{result['enforcement']['risk_score']:.1f}")
-            with col2:
-                violations = len(result['enforcement']['validation']['violations'])
-                st.metric("Violations", violations)
-            with col3:
-                rules_checked = result['enforcement']['validation']['rules_evaluated']
-                st.metric("Rules Evaluated", len(rules_checked))
-            
-            # Violations
-            if result['enforcement']['validation']['violations']:
-                st.markdown("### ⚠️ Compliance Violations")
-                for violation in result['enforcement']['validation']['violations']:
-                    st.error(f"• {violation}")
-            
-            # Rules evaluated
-            st.markdown("### 📋 Rules Evaluated")
-            for rule_result in result['enforcement']['validation']['rules_evaluated']:
-                status_icon = "✅" if rule_result['passed'] else "❌"
-                with st.expander(f"{status_icon} {rule_result['category']} - Rule {rule_result['rule_id']}"):
-                    st.json(rule_result)
+            record_audit_entry(result)
+            st.session_state.last_test_result = result
+    
+    # The latest result stays on screen across reruns, e.g. from the rule selector below
+    result = st.session_state.last_test_result
+    if result is None:
+        return
+    
+    # Display results
+    st.markdown("---")
+    st.markdown("### 📊 Governance Decision")
+    
+    if result['status'] == 'approved':
+        st.success("✅ **ACTION APPROVED**")
+        st.markdown(f'<div class="approved">Status: APPROVED</div>', unsafe_allow_html=True)
+    else:
+        st.error("❌ **ACTION BLOCKED**")
+        st.markdown(f'<div class="blocked">Status: BLOCKED</div>', unsafe_allow_html=True)
+    
+    # Metrics
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Risk Score", f"{result['enforcement']['risk_score']:.1f}")
+    with col2:
+        violations = len(result['enforcement']['validation']['violations'])
+        st.metric("Violations", violations)
+    with col3:
+        rules_checked = result['enforcement']['validation']['rules_evaluated']
+        st.metric("Rules Evaluated", len(rules_checked))
+    
+    # Violations
+    if result['enforcement']['validation']['violations']:
+        st.markdown("### ⚠️ Compliance Violations")
+        for violation in result['enforcement']['validation']['violations']:
+            st.error(f"• {violation}")
+    
+    # Rules evaluated: one table, with full details for the selected rule only
+    st.markdown("### 📋 Rules Evaluated")
+    rules_evaluated = result['enforcement']['validation']['rules_evaluated']
+    if rules_evaluated:
+        st.dataframe(
+            [
+                {
+                    'Status': "✅" if rule_result['passed'] else "❌",
+                    'Category': rule_result['category'],
+                    'Rule ID': rule_result['rule_id'],
+                    'Violations': len(rule_result['violations'])
+                }
+                for rule_result in rules_evaluated
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        selected = st.selectbox(
+            "Inspect rule",
+            range(len(rules_evaluated)),
+            format_func=lambda i: (
+                f"{'✅' if rules_evaluated[i]['passed'] else '❌'} "
+                f"{rules_evaluated[i]['category']} - Rule {rules_evaluated[i]['rule_id']}"
+            )
+        )
+        st.json(rules_evaluated[selected])
 
 
 def analytics_page():
@@ -425,8 +647,9 @@ def analytics_page():
     # Summary metrics
     st.markdown("### 📈 Summary Metrics")
     
+    stats = st.session_state.audit_stats
     total_checks = len(st.session_state.audit_trail)
-    approved = sum(1 for entry in st.session_state.audit_trail if entry['status'] == 'approved')
+    approved = stats['approved']
     blocked = total_checks - approved
     
     col1, col2, col3, col4 = st.columns(4)
@@ -438,27 +661,23 @@ def analytics_page():
     with col3:
         st.metric("Blocked", blocked, delta=f"-{blocked/total_checks*100:.1f}%")
     with col4:
-        avg_risk = sum(e['enforcement']['risk_score'] for e in st.session_state.audit_trail) / total_checks
+        avg_risk = stats['risk_total'] / total_checks
         st.metric("Avg Risk Score", f"{avg_risk:.1f}")
     
     # Audit trail
     st.markdown("### 📜 Audit Trail")
     
-    for i, entry in enumerate(reversed(st.session_state.audit_trail), 1):
-        status_color = "green" if entry['status'] == 'approved' else "red"
-        
-        with st.expander(
-            f"{'✅' if entry['status'] == 'approved' else '❌'} "
-            f"Entry {i}: {entry['context'].action} - "
-            f"{entry['context'].timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-        ):
+    # Entries are numbered newest first, so only the number is formatted here
+    audit_entries = zip(reversed(st.session_state.audit_trail), reversed(st.session_state.audit_view))
+    for i, (entry, view) in enumerate(audit_entries, 1):
+        with st.expander(f"{view['icon']} Entry {i}: {view['label']}"):
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown(f"**Request ID:** `{entry['context'].request_id}`")
                 st.markdown(f"**User ID:** {entry['context'].user_id}")
                 st.markdown(f"**Action:** {entry['context'].action}")
-                st.markdown(f"**Status:** :{status_color}[{entry['status'].upper()}]")
+                st.markdown(f"**Status:** :{view['status_color']}[{entry['status'].upper()}]")
             
             with col2:
                 st.markdown(f"**Risk Score:** {entry['enforcement']['risk_score']:.1f}")
@@ -467,7 +686,7 @@ def analytics_page():
                 st.markdown(f"**Violations:** {violations}")
             
             st.markdown("**Parameters:**")
-            st.json(entry['context'].parameters)
+            st.json(view['params_json'])
             
             if entry['enforcement']['validation']['violations']:
                 st.markdown("**Violations:**")
@@ -476,24 +695,12 @@ def analytics_page():
     
     # Export audit trail
     if st.button("📥 Export Audit Trail"):
-        audit_export = [
-            {
-                'timestamp': entry['context'].timestamp.isoformat(),
-                'request_id': entry['context'].request_id,
-                'user_id': entry['context'].user_id,
-                'action': entry['context'].action,
-                'status': entry['status'],
-                'risk_score': entry['enforcement']['risk_score'],
-                'violations': entry['enforcement']['validation']['violations']
-            }
-            for entry in st.session_state.audit_trail
-        ]
-        
+        # One JSON object per line, so no list of export records is built
         st.download_button(
-            label="⬇️ Download Audit Trail (JSON)",
-            data=json.dumps(audit_export, indent=2),
-            file_name=f"audit_trail_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json"
+            label="⬇️ Download Audit Trail (JSONL)",
+            data=audit_export_ndjson(st.session_state.audit_trail),
+            file_name=f"audit_trail_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+            mime="application/x-ndjson"
         )
 
 